@@ -0,0 +1,255 @@
+"""Bulk import of legacy/offline complaints from CSV or NDJSON.
+
+    python bulk_import.py lab complaints.csv --import-id lab-2019-2024 --errors-out errors.ndjson
+
+Rows are validated with the same models as the submission endpoints in a process pool
+and written in ordered insert_many batches. Progress is checkpointed per batch in the
+`import_jobs` collection, so re-running with the same --import-id resumes where it
+stopped; row ids are derived from (import_id, row number), so replayed rows are found
+and skipped instead of being duplicated. A completed import is never resumed. Lab rows carry their MinHash signature, computed
+in the pool, so the API workers index imported complaints without hashing any text.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import get_args
+
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from complaint_clustering import cluster_index
+from models import ComplaintStatus, LabComplaintCreate, ICCComplaintCreate
+
+IMPORT_NAMESPACE = uuid.UUID("6f1c1c0e-6c1b-4a4e-9d0e-2b4f1d9c7a31")
+MODELS = {"lab": LabComplaintCreate, "icc": ICCComplaintCreate}
+STATUSES = set(get_args(ComplaintStatus))
+DEFAULT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+
+def detect_format(filename: str) -> str:
+    suffix = Path(filename or "").suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError("Unsupported file type, expected .csv, .ndjson or .jsonl")
+
+def iter_records(stream, fmt: str):
+    """Yield (row_number, record) from a text stream; row numbers start at 1 for the first data row."""
+    if fmt == "csv":
+        for row_number, record in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, record
+        return
+
+    for row_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            record = {"__error__": f"Invalid JSON: {e.msg}"}
+        yield row_number, record
+
+def build_import_doc(complaint_type: str, import_id: str, row_number: int, record: dict) -> dict:
+    if not isinstance(record, dict):
+        raise ValueError("Row must be an object")
+    if "__error__" in record:
+        raise ValueError(record["__error__"])
+
+    # CSV leaves empty cells as "", which should mean "not provided"
+    record = {k.strip(): (None if v == "" else v) for k, v in record.items() if k}
+
+    status = record.pop("status", None) or "pending"
+    if status not in STATUSES:
+        raise ValueError(f"status: must be one of {', '.join(sorted(STATUSES))}")
+
+    created_at = record.pop("created_at", None)
+    if created_at:
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise ValueError("created_at: must be an ISO 8601 timestamp")
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        # Stored as UTC like every other timestamp: sorts compare these strings as text
+        created_at = created_at.astimezone(timezone.utc)
+    else:
+        created_at = datetime.now(timezone.utc)
+
+    complaint = MODELS[complaint_type].model_validate(record)
+    doc = {
+        "id": str(uuid.uuid5(IMPORT_NAMESPACE, f"{import_id}:{row_number}")),
+        **complaint.model_dump(),
+        "status": status,
+        "version": 0,
+        "created_at": created_at.isoformat(),
+        "import_id": import_id,
+    }
+    signature = cluster_index.hasher.signature(complaint.complaint) if complaint_type == "lab" else None
+    if signature:
+        doc["minhash"] = list(signature)
+    return doc
+
+def validate_chunk(complaint_type: str, import_id: str, rows: list):
+    """Runs in a worker process. Returns (docs, errors) for one chunk of rows."""
+    docs, errors = [], []
+    for row_number, record in rows:
+        try:
+            docs.append(build_import_doc(complaint_type, import_id, row_number, record))
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "errors": [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+            })
+        except ValueError as e:
+            errors.append({"row": row_number, "errors": [str(e)]})
+    return docs, errors
+
+async def insert_ordered(collection, docs: list):
+    """insert_many(ordered=True), skipping rows already present from an earlier interrupted run."""
+    if not docs:
+        return 0, 0
+    existing = {d["id"] async for d in collection.find({"id": {"$in": [d["id"] for d in docs]}}, {"_id": 0, "id": 1})}
+    new_docs = [d for d in docs if d["id"] not in existing]
+    if new_docs:
+        await collection.insert_many(new_docs, ordered=True)
+    return len(new_docs), len(docs) - len(new_docs)
+
+def _chunks(records, resume_after: int, size: int):
+    chunk = []
+    for row_number, record in records:
+        if row_number <= resume_after:
+            continue
+        chunk.append((row_number, record))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def run_import(db, complaint_type: str, records, import_id: str, executor, batch_size: int = DEFAULT_BATCH_SIZE, max_in_flight: int = 4):
+    collection = db[f"{complaint_type}_complaints"]
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        # A completed job doesn't match, so the upsert collides with it on the unique import_id
+        job = await db.import_jobs.find_one_and_update(
+            {"import_id": import_id, "status": {"$ne": "completed"}},
+            {
+                "$setOnInsert": {"type": complaint_type, "rows_committed": 0, "created_at": now},
+                "$set": {"status": "running", "updated_at": now}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection={"_id": 0}
+        )
+    except DuplicateKeyError:
+        raise ValueError(f"Import {import_id} already completed; use a new import id for new data")
+    if job["type"] != complaint_type:
+        raise ValueError(f"Import {import_id} belongs to {job['type']} complaints")
+    resume_after = job["rows_committed"]
+
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    summary = {"import_id": import_id, "resumed_after_row": resume_after, "inserted": 0, "skipped_existing": 0, "failed": 0, "errors": []}
+
+    async def commit_next():
+        last_row, future = pending.popleft()
+        docs, errors = await future
+        # Lets the API workers pick the new rows up in their cluster index sync
+        now = datetime.now(timezone.utc).isoformat()
+        for doc in docs:
+            doc["updated_at"] = now
+        inserted, skipped = await insert_ordered(collection, docs)
+        summary["inserted"] += inserted
+        summary["skipped_existing"] += skipped
+        summary["failed"] += len(errors)
+        summary["errors"].extend(errors)
+        await db.import_jobs.update_one(
+            {"import_id": import_id},
+            {
+                "$set": {"rows_committed": last_row, "updated_at": datetime.now(timezone.utc).isoformat()},
+                "$inc": {"inserted": inserted, "failed": len(errors)}
+            }
+        )
+
+    # Validation of the next chunks overlaps with inserting the current one; committing
+    # strictly in submission order keeps the checkpoint a simple "rows up to N are done".
+    status = "failed"
+    try:
+        for chunk in _chunks(records, resume_after, batch_size):
+            pending.append((chunk[-1][0], loop.run_in_executor(executor, validate_chunk, complaint_type, import_id, chunk)))
+            if len(pending) >= max_in_flight:
+                await commit_next()
+        while pending:
+            await commit_next()
+        status = "completed"
+    finally:
+        await db.import_jobs.update_one(
+            {"import_id": import_id},
+            {"$set": {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        )
+    return summary
+
+def file_import_id(path: str) -> str:
+    """Default import id: the file name plus a hash of its contents, so a new export saved
+    under an old name is a new import rather than a "resume" that skips its rows."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{Path(path).name}-{digest.hexdigest()[:16]}"
+
+def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Bulk import complaints from CSV or NDJSON")
+    parser.add_argument("type", choices=sorted(MODELS))
+    parser.add_argument("path")
+    parser.add_argument("--import-id", help="Stable id for this import; reuse it to resume (default: file name and content hash)")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--errors-out", help="Write the per-row error report here as NDJSON")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    fmt = args.format or detect_format(args.path)
+    import_id = args.import_id or file_import_id(args.path)
+
+    async def _run():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ['DB_NAME']]
+        try:
+            with open(args.path, encoding="utf-8-sig", newline="") as stream, \
+                    ProcessPoolExecutor(max_workers=args.workers) as executor:
+                return await run_import(
+                    db, args.type, iter_records(stream, fmt), import_id, executor,
+                    batch_size=args.batch_size, max_in_flight=args.workers * 2
+                )
+        finally:
+            client.close()
+
+    summary = asyncio.run(_run())
+    errors = summary.pop("errors")
+    if args.errors_out:
+        with open(args.errors_out, "w", encoding="utf-8") as out:
+            for error in errors:
+                out.write(json.dumps(error) + "\n")
+    elif errors:
+        for error in errors[:20]:
+            print(f"row {error['row']}: {'; '.join(error['errors'])}", file=sys.stderr)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import logging
+
+from pymongo import ReadPreference, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+class CacheGenerations:
+    """Per-collection write counters in Mongo that keep worker-local state in step.
+
+    Every write to a complaint collection bumps its counter. List reads compare the current
+    counter with the one their cached body was built at, so no worker serves a list older
+    than the last write. A background poller notices bumps from any worker and hands them
+    to a callback that refreshes the rest of the local state (tracking cache, cluster index).
+
+    Writes that change what a student's tracking lookup returns (status changes, deletes)
+    record the affected complaint ids with their generation, so workers can invalidate just
+    those entries. Only the last `max_changes` such records are kept.
+    """
+
+    def __init__(self):
+        self.poll_seconds = float(os.getenv('CACHE_SYNC_INTERVAL_SECONDS', '1'))
+        self.max_changes = int(os.getenv('CACHE_SYNC_MAX_CHANGES', '1000'))
+        self._collection = None
+        self._seen = {}
+        self._task = None
+
+    async def bump(self, scope: str, complaint_ids=()) -> int:
+        complaint_ids = list(complaint_ids)
+        # A pipeline update, so the new generation and its ids are written in one step
+        pipeline = [{"$set": {"generation": {"$add": [{"$ifNull": ["$generation", 0]}, 1]}}}]
+        if complaint_ids:
+            change = {"generation": "$generation", "ids": complaint_ids}
+            pipeline.append({"$set": {"changes": {"$slice": [
+                {"$concatArrays": [{"$ifNull": ["$changes", []]}, [change]]},
+                -self.max_changes
+            ]}}})
+        doc = await self._collection.find_one_and_update(
+            {"_id": scope},
+            pipeline,
+            upsert=True,
+            projection={"changes": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["generation"]
+
+    async def current(self, scope: str) -> int:
+        doc = await self._collection.find_one({"_id": scope}, {"changes": 0})
+        return doc["generation"] if doc else 0
+
+    async def _changed_ids(self, scope: str, since: int):
+        """Complaint ids recorded after generation `since`, or None if records were dropped."""
+        doc = await self._collection.find_one({"_id": scope}, {"changes": 1})
+        changes = (doc or {}).get("changes", [])
+        if len(changes) >= self.max_changes and changes[0]["generation"] > since + 1:
+            return None
+        return {cid for change in changes if change["generation"] > since for cid in change["ids"]}
+
+    async def poll(self, on_change):
+        """Await `on_change(scope, complaint_ids)` for every scope with a new generation.
+
+        `complaint_ids` is None when the changed complaints are unknown (first poll, or more
+        changes than are kept), in which case the callback must assume anything changed.
+        """
+        async for doc in self._collection.find({}, {"changes": 0}):
+            scope, generation = doc["_id"], doc["generation"]
+            seen = self._seen.get(scope)
+            if seen == generation:
+                continue
+            complaint_ids = None if seen is None else await self._changed_ids(scope, seen)
+            await on_change(scope, complaint_ids)
+            self._seen[scope] = generation
+
+    async def _run(self, on_change):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.poll(on_change)
+            except Exception as e:
+                logger.error(f"Failed to sync worker caches: {str(e)}")
+
+    def start(self, collection, on_change):
+        """Poll `collection` in the background and call `on_change` for every new generation, local or not."""
+        # Counters must never be read stale, whatever the client's read preference is
+        self._collection = collection.with_options(read_preference=ReadPreference.PRIMARY)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(on_change))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+cache_generations = CacheGenerations()
@@ -0,0 +1,236 @@
+import asyncio
+import os
+import random
+import unicodedata
+import zlib
+import logging
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Universal hashing (a*h + b) mod p with h < 2^32 and a, b < p = 2^31 - 1 stays inside uint64
+_PRIME = (1 << 31) - 1
+
+# Words that say nothing about *what* is broken. Without them, "Internet is not working in
+# the lab" and "Projector is not working in the lab" share almost every word.
+STOP_WORDS = frozenset("""
+    a an the is are was were be been am it its this that these those there here and or but
+    of in on at to for from with by as since not no nor any all some very too also just still
+    i me my we our us you your he she they them their please kindly sir madam maam
+    lab labs room working work works worked properly issue problem complaint today morning
+    है हैं था थी थे नहीं ना में का की के को से पर और भी कर रहा रही रहे हो गया गई
+""".split())
+
+def words(text: str) -> list:
+    """Casefolded words of `text`: runs of letters, digits and combining marks.
+
+    Combining marks count as word characters so Devanagari vowel signs don't split words
+    (the `\\w` regex class excludes them).
+    """
+    chars = [c if unicodedata.category(c)[0] in "LNM" else " " for c in unicodedata.normalize("NFKC", text).casefold()]
+    return "".join(chars).split()
+
+class MinHasher:
+    """MinHash signatures over the content words of a complaint text.
+
+    Texts with fewer than `min_shingles` content words get no signature: "AC not working"
+    and "Fan not working" carry too little to tell apart, so they are never linked.
+    """
+
+    def __init__(self, num_perm: int = 64, min_shingles: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.min_shingles = min_shingles
+        rng = random.Random(seed)
+        self._a = np.array([rng.randint(1, _PRIME - 1) for _ in range(num_perm)], dtype=np.uint64)
+        self._b = np.array([rng.randint(0, _PRIME - 1) for _ in range(num_perm)], dtype=np.uint64)[:, None]
+
+    def shingles(self, text: str) -> set:
+        return {w for w in words(text) if w not in STOP_WORDS}
+
+    def signature(self, text: str):
+        """MinHash signature as a tuple, or None when the text is too short to compare."""
+        shingles = self.shingles(text)
+        if len(shingles) < self.min_shingles:
+            return None
+        # crc32 rather than hash(): signatures must agree across processes (import pool, workers)
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return tuple(((np.outer(self._a, hashes) + self._b) % _PRIME).min(axis=1).tolist())
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures for the open complaints of one lab."""
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self._buckets = [dict() for _ in range(bands)]
+        self._signatures = {}
+        self._parents = {}
+        # parent id -> ids of its duplicates, so removing a parent doesn't scan the index
+        self._members = {}
+
+    def _band_keys(self, signature: tuple):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def add(self, complaint_id: str, signature: tuple, parent_id: str = None):
+        self.remove(complaint_id)
+        parent_id = parent_id or complaint_id
+        self._signatures[complaint_id] = signature
+        self._parents[complaint_id] = parent_id
+        if parent_id != complaint_id:
+            self._members.setdefault(parent_id, set()).add(complaint_id)
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, set()).add(complaint_id)
+
+    def remove(self, complaint_id: str):
+        signature = self._signatures.pop(complaint_id, None)
+        if signature is None:
+            return
+        parent_id = self._parents.pop(complaint_id)
+        if parent_id != complaint_id:
+            members = self._members.get(parent_id)
+            if members is not None:
+                members.discard(complaint_id)
+                if not members:
+                    del self._members[parent_id]
+        for band, key in self._band_keys(signature):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(complaint_id)
+                if not bucket:
+                    del self._buckets[band][key]
+        # Members of a removed cluster become standalone complaints
+        for cid in self._members.pop(complaint_id, ()):
+            self._parents[cid] = cid
+
+    def parent_of(self, complaint_id: str):
+        return self._parents.get(complaint_id)
+
+    def best_match(self, signature: tuple, threshold: float):
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        best_id, best_score = None, threshold
+        for cid in candidates:
+            other = self._signatures[cid]
+            score = sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+            if score >= best_score:
+                best_id, best_score = cid, score
+        if best_id is None:
+            return None, 0.0
+        return self._parents[best_id], best_score
+
+class ComplaintClusterIndex:
+    """Per-lab LSH indexes used to link near-duplicate lab complaints to a parent complaint.
+
+    Only open (non-resolved) complaints are indexed so a new report is never attached to
+    a cluster that has already been closed.
+    """
+
+    def __init__(self):
+        self.threshold = float(os.getenv('DUPLICATE_SIMILARITY_THRESHOLD', '0.6'))
+        self.bands = int(os.getenv('DUPLICATE_LSH_BANDS', '16'))
+        self.rows = int(os.getenv('DUPLICATE_LSH_ROWS', '4'))
+        self.hasher = MinHasher(
+            num_perm=self.bands * self.rows,
+            min_shingles=int(os.getenv('DUPLICATE_MIN_WORDS', '3'))
+        )
+        # Re-read window for sync(): covers write latency and clock skew between workers
+        self.sync_overlap = timedelta(seconds=float(os.getenv('CLUSTER_SYNC_OVERLAP_SECONDS', '10')))
+        self._labs = {}
+        self._lab_of = {}
+        self._synced_at = datetime.now(timezone.utc)
+
+    def _index_for(self, lab_number: str) -> LSHIndex:
+        key = lab_number.strip().lower()
+        if key not in self._labs:
+            self._labs[key] = LSHIndex(self.bands, self.rows)
+        return self._labs[key]
+
+    def find_parent(self, lab_number: str, text: str):
+        """Return (signature or None, parent_id or None) for a new complaint."""
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return None, None
+        parent_id, _ = self._index_for(lab_number).best_match(signature, self.threshold)
+        return signature, parent_id
+
+    def __contains__(self, complaint_id: str) -> bool:
+        return complaint_id in self._lab_of
+
+    def add(self, complaint_id: str, lab_number: str, signature: tuple, parent_id: str = None):
+        """Index an open complaint; a parent that is not itself indexed (closed) is ignored.
+
+        Complaints without a signature (too short) are not indexed.
+        """
+        if parent_id not in self._lab_of:
+            parent_id = None
+        self.remove(complaint_id)
+        if signature is None:
+            return
+        self._index_for(lab_number).add(complaint_id, signature, parent_id)
+        self._lab_of[complaint_id] = lab_number
+
+    def remove(self, complaint_id: str):
+        lab_number = self._lab_of.pop(complaint_id, None)
+        if lab_number is not None:
+            self._index_for(lab_number).remove(complaint_id)
+
+    def signature_of(self, doc: dict):
+        """The signature stored on a complaint document, or one computed from its text."""
+        signature = doc.get("minhash")
+        if signature and len(signature) == self.hasher.num_perm:
+            return tuple(signature)
+        return self.hasher.signature(doc.get("complaint") or "")
+
+    async def rebuild(self, collection):
+        """Rebuild from Mongo into a new index and swap it in, so lookups never see it half built.
+
+        Changes applied while rebuilding are picked up again by the next sync().
+        """
+        started = datetime.now(timezone.utc)
+        fresh = ComplaintClusterIndex()
+        cursor = collection.find(
+            {"status": {"$ne": "resolved"}, "lab_number": {"$ne": None}},
+            {"_id": 0, "id": 1, "lab_number": 1, "complaint": 1, "parent_id": 1, "minhash": 1}
+        ).sort("created_at", 1)
+        count = 0
+        async for doc in cursor:
+            # Oldest first, so an open parent is always indexed before its duplicates
+            fresh.add(doc["id"], doc["lab_number"], self.signature_of(doc), doc.get("parent_id"))
+            count += 1
+            if count % 1000 == 0:
+                await asyncio.sleep(0)
+        self._labs, self._lab_of = fresh._labs, fresh._lab_of
+        self._synced_at = started
+        logger.info(f"Complaint cluster index rebuilt with {count} open lab complaints")
+
+    async def sync(self, collection):
+        """Apply complaints created, resolved or reopened (by any worker) since the last sync.
+
+        Relies on every such write setting `updated_at`. Deletions are not seen here; a
+        deleted parent is dropped when a new complaint fails to link to it.
+        """
+        started = datetime.now(timezone.utc)
+        cursor = collection.find(
+            {"updated_at": {"$gte": (self._synced_at - self.sync_overlap).isoformat()}},
+            {"_id": 0, "id": 1, "lab_number": 1, "complaint": 1, "parent_id": 1, "status": 1, "minhash": 1}
+        ).sort("created_at", 1)
+        count = 0
+        async for doc in cursor:
+            if doc.get("status") == "resolved" or not doc.get("lab_number"):
+                self.remove(doc["id"])
+            elif doc["id"] not in self:
+                self.add(doc["id"], doc["lab_number"], self.signature_of(doc), doc.get("parent_id"))
+            count += 1
+            # A bulk import can land many rows at once; let requests run between chunks
+            if count % 1000 == 0:
+                await asyncio.sleep(0)
+        self._synced_at = started
+
+cluster_index = ComplaintClusterIndex()
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+from auth_utils import hash_token
+
+# Projection served entirely from the tracking index (see ensure_indexes in server.py)
+TRACKING_PROJECTION = {"_id": 0, "id": 1, "status": 1, "created_at": 1, "updated_at": 1}
+
+def create_tracking_token(complaint_type: str) -> str:
+    """Secret handed to the student at submission; the prefix routes lookups to the right collection."""
+    return f"{complaint_type}.{secrets.token_urlsafe(16)}"
+
+def parse_tracking_token(token: str):
+    complaint_type, _, secret = token.partition(".")
+    if complaint_type not in ("lab", "icc") or not secret:
+        return None, None
+    return complaint_type, hash_token(token)
+
+class TrackingCache:
+    """Short-TTL cache of tracking lookups keyed by (complaint_id, token hash).
+
+    Misses are cached too, and concurrent misses for the same key share one Mongo query,
+    so thousands of polling clients cost at most one lookup per key per TTL window.
+    Status updates and deletes invalidate every entry of the affected complaints, on this
+    worker at once and on the others when they see the change in `cache_generations`.
+    """
+
+    def __init__(self):
+        self.ttl_seconds = float(os.getenv('TRACKING_CACHE_TTL_SECONDS', '15'))
+        self.max_entries = int(os.getenv('TRACKING_CACHE_MAX_ENTRIES', '50000'))
+        self._entries = OrderedDict()
+        self._by_complaint = {}
+        self._in_flight = {}
+
+    async def get_or_load(self, complaint_id: str, token_hash: str, loader):
+        key = (complaint_id, token_hash)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(loader())
+            self._in_flight[key] = future
+            try:
+                value = await future
+            finally:
+                current = self._in_flight.get(key)
+                if current is future:
+                    del self._in_flight[key]
+            # An invalidation while loading drops the in-flight entry; don't cache stale data
+            if current is future:
+                self._store(key, value)
+            return value
+        return await asyncio.shield(future)
+
+    def _store(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._by_complaint.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            keys = self._by_complaint.get(old_key[0])
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del self._by_complaint[old_key[0]]
+
+    def clear(self):
+        self._entries.clear()
+        self._by_complaint.clear()
+        self._in_flight.clear()
+
+    def invalidate(self, complaint_id: str):
+        for key in self._by_complaint.pop(complaint_id, ()):
+            self._entries.pop(key, None)
+        for key in [k for k in self._in_flight if k[0] == complaint_id]:
+            del self._in_flight[key]
+
+tracking_cache = TrackingCache()
@@ -16,6 +16,32 @@ class EmailService:
         self.smtp_password = os.getenv('SMTP_PASSWORD')
         self.from_email = os.getenv('EMAILS_FROM_EMAIL')
         self.from_name = os.getenv('EMAILS_FROM_NAME', 'Complaint Portal')
+        self.frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000').rstrip('/')
+    
+    def send_submission_email(self, to_email: str, complaint_type: str, student_name: str, complaint_id: str, tracking_token: str):
+        subject = f"Complaint Received - {complaint_type}"
+        # The token goes in the URL fragment, which browsers never send to a server
+        tracking_url = f"{self.frontend_url}/track/{complaint_id}#{tracking_token}"
+        
+        body = f"""
+        <html>
+            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+                <div style="max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f8fafc; border: 1px solid #e2e8f0; border-radius: 8px;">
+                    <h2 style="color: #0f172a; margin-bottom: 20px;">Complaint Received</h2>
+                    <p>Dear {student_name},</p>
+                    <p>Your {complaint_type} complaint (ID: <strong>{complaint_id}</strong>) has been received.</p>
+                    <div style="background-color: #2563eb; padding: 15px; border-radius: 5px; text-align: center; margin: 20px 0;">
+                        <a href="{tracking_url}" style="color: white; font-weight: bold; text-decoration: none;">Track your complaint</a>
+                    </div>
+                    <p>Your tracking code is <strong>{tracking_token}</strong>. Keep this email: anyone with the link can see your complaint's status.</p>
+                    <hr style="border: none; border-top: 1px solid #e2e8f0; margin: 20px 0;">
+                    <p style="font-size: 12px; color: #64748b;">This is an automated message from the Complaint Management System. Please do not reply to this email.</p>
+                </div>
+            </body>
+        </html>
+        """
+        
+        return self._send_email(to_email, subject, body)
     
     def send_status_update_email(self, to_email: str, complaint_type: str, student_name: str, status: str, complaint_id: str):
         subject = f"Complaint Status Update - {complaint_type}"
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, EmailStr
+from typing import Literal, Optional
+
+# Kept free of app/database imports so bulk-import worker processes can load them cheaply
+
+ComplaintStatus = Literal["pending", "in_progress", "resolved"]
+
+class LabComplaintCreate(BaseModel):
+    name: str
+    roll_number: str
+    stream: str
+    phone: str
+    email: EmailStr
+    lab_number: str
+    complaint: str
+    photo_base64: Optional[str] = None
+
+class ICCComplaintCreate(BaseModel):
+    name: str
+    roll_number: str
+    stream: str
+    phone: str
+    email: EmailStr
+    complaint: str
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks checked-out and waiting connections per server so readiness checks can
+    report pool saturation (pymongo exposes no public counter for this)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_out = {}
+        self._waiting = {}
+        self._open = {}
+
+    def _bump(self, counter: dict, address, delta: int):
+        with self._lock:
+            counter[address] = max(0, counter.get(address, 0) + delta)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checked_out": sum(self._checked_out.values()),
+                "waiting": sum(self._waiting.values()),
+                "open": sum(self._open.values()),
+            }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._checked_out.pop(event.address, None)
+            self._waiting.pop(event.address, None)
+            self._open.pop(event.address, None)
+
+    def connection_created(self, event):
+        self._bump(self._open, event.address, 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump(self._open, event.address, -1)
+
+    def connection_check_out_started(self, event):
+        self._bump(self._waiting, event.address, 1)
+
+    def connection_check_out_failed(self, event):
+        self._bump(self._waiting, event.address, -1)
+
+    def connection_checked_out(self, event):
+        self._bump(self._waiting, event.address, -1)
+        self._bump(self._checked_out, event.address, 1)
+
+    def connection_checked_in(self, event):
+        self._bump(self._checked_out, event.address, -1)
+
+pool_monitor = PoolMonitor()
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    """Records operations slower than a threshold, grouped by normalized query shape.
+
+    Listener callbacks run on pymongo's threads, so explains are handed to the event loop
+    captured in `start()` and run there in the background, sampled and at most once per
+    shape at a time. Offenders are kept in a bounded LRU of shapes.
+    """
+
+    COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+    def __init__(self):
+        self.threshold_ms = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+        self.explain_sample_rate = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.2'))
+        self.max_shapes = int(os.getenv('SLOW_QUERY_MAX_SHAPES', '200'))
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._shapes = OrderedDict()
+        self._explaining = set()
+        self._loop = None
+        self._db = None
+
+    def start(self, db):
+        self._db = db
+        self._loop = asyncio.get_running_loop()
+
+    def started(self, event):
+        if event.command_name in self.COMMANDS:
+            with self._lock:
+                self._in_flight[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        with self._lock:
+            command = self._in_flight.pop((event.connection_id, event.request_id), None)
+        if command is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms >= self.threshold_ms:
+            self._record(event.command_name, event.database_name, command, duration_ms)
+
+    def _record(self, command_name: str, database_name: str, command, duration_ms: float):
+        collection = command.get(command_name)
+        shape = _command_shape(command_name, command)
+        key = json.dumps([command_name, collection, shape], sort_keys=True, default=str)
+        now = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            entry = self._shapes.pop(key, None)
+            if entry is None:
+                entry = {
+                    "command": command_name,
+                    "collection": collection,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "first_seen": now,
+                    "explain": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_seen"] = now
+            self._shapes[key] = entry
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+
+            want_explain = (
+                self._loop is not None
+                and key not in self._explaining
+                and (entry["explain"] is None or random.random() < self.explain_sample_rate)
+            )
+            if want_explain:
+                self._explaining.add(key)
+
+        logger.warning(f"Slow {command_name} on {database_name}.{collection} took {duration_ms:.1f}ms, shape={shape}")
+
+        if want_explain:
+            explain_cmd = _explainable(command_name, command)
+            if explain_cmd is None:
+                with self._lock:
+                    self._explaining.discard(key)
+                return
+            self._loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._explain(key, explain_cmd)))
+
+    async def _explain(self, key: str, explain_cmd: dict):
+        try:
+            result = await self._db.command({"explain": explain_cmd, "verbosity": "executionStats"})
+            summary = _summarize_explain(result)
+        except Exception as e:
+            summary = {"error": str(e)}
+        with self._lock:
+            self._explaining.discard(key)
+            if key in self._shapes:
+                self._shapes[key]["explain"] = summary
+
+    def report(self) -> list:
+        with self._lock:
+            entries = [dict(e) for e in self._shapes.values()]
+        for e in entries:
+            e["avg_ms"] = round(e["total_ms"] / e["count"], 2)
+            e["total_ms"] = round(e["total_ms"], 2)
+            e["max_ms"] = round(e["max_ms"], 2)
+        return sorted(entries, key=lambda e: e["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+
+def _normalize(value):
+    """Replace literal values with their type so queries differing only in values share a shape."""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value[:1]] if value else []
+    return type(value).__name__
+
+def _command_shape(command_name: str, command) -> dict:
+    if command_name == "aggregate":
+        return {"pipeline": _normalize(list(command.get("pipeline", [])))}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes", [])
+        return {"filter": _normalize(statements[0].get("q", {})) if statements else {}}
+    shape = {"filter": _normalize(command.get("filter", command.get("query", {})))}
+    if command.get("sort"):
+        shape["sort"] = dict(command["sort"])
+    return shape
+
+def _explainable(command_name: str, command):
+    if command_name == "find":
+        keys = ("find", "filter", "sort", "projection", "limit", "skip")
+    elif command_name == "aggregate":
+        keys = ("aggregate", "pipeline", "cursor")
+    elif command_name in ("count", "distinct"):
+        keys = (command_name, "query", "key")
+    elif command_name == "findAndModify":
+        # Explain the lookup part as a find so the plan is captured without touching writes
+        return {"find": command["findAndModify"], "filter": command.get("query", {}), "sort": command.get("sort") or {}}
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes", [])
+        return {"find": command[command_name], "filter": statements[0].get("q", {}) if statements else {}}
+    else:
+        return None
+    return {k: command[k] for k in keys if k in command}
+
+def _summarize_explain(result: dict) -> dict:
+    planner = result.get("queryPlanner", {})
+    stages, indexes = [], []
+
+    def walk(plan):
+        if not isinstance(plan, dict):
+            return
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        if "indexName" in plan:
+            indexes.append(plan["indexName"])
+        for child_key in ("inputStage", "queryPlan"):
+            walk(plan.get(child_key))
+        for child in plan.get("inputStages", []):
+            walk(child)
+
+    walk(planner.get("winningPlan", {}))
+    stats = result.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+slow_query_recorder = SlowQueryRecorder()
@@ -0,0 +1,198 @@
+import asyncio
+import gzip
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+# Bodies above this size are compressed in a worker thread to keep the event loop free
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv('COMPRESSION_OFFLOAD_SIZE', '65536'))
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+COMPRESSORS = {}
+
+try:
+    import zstandard
+    _zstd_level = int(os.getenv('ZSTD_LEVEL', '3'))
+    # ZstdCompressor is not thread-safe and large bodies are compressed via to_thread,
+    # so each thread gets its own compressor
+    _zstd_local = threading.local()
+
+    def _zstd_compress(data: bytes) -> bytes:
+        compressor = getattr(_zstd_local, "compressor", None)
+        if compressor is None:
+            compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=_zstd_level)
+        return compressor.compress(data)
+
+    COMPRESSORS["zstd"] = _zstd_compress
+except ImportError:
+    pass
+
+try:
+    import brotli
+    _brotli_quality = int(os.getenv('BROTLI_QUALITY', '5'))
+    COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=_brotli_quality)
+except ImportError:
+    pass
+
+_gzip_level = int(os.getenv('GZIP_LEVEL', '6'))
+COMPRESSORS["gzip"] = lambda data: gzip.compress(data, compresslevel=_gzip_level)
+
+# Server-side preference when the client accepts several encodings with equal weight
+ENCODING_PREFERENCE = ["zstd", "br", "gzip"]
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best available encoding from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    candidates = []
+    for rank, encoding in enumerate(ENCODING_PREFERENCE):
+        if encoding not in COMPRESSORS:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0:
+            candidates.append((-q, rank, encoding))
+
+    return min(candidates)[2] if candidates else None
+
+async def compress(encoding: str, data: bytes) -> bytes:
+    if len(data) >= COMPRESSION_OFFLOAD_SIZE:
+        return await asyncio.to_thread(COMPRESSORS[encoding], data)
+    return COMPRESSORS[encoding](data)
+
+class CompressionMiddleware:
+    """Content-negotiated response compression (zstd, brotli, gzip).
+
+    Only single-message responses are compressed; streaming bodies and responses that
+    already carry a Content-Encoding (e.g. precompressed cache entries) pass through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = await compress(encoding, body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+class CachedBody:
+    """A serialized response body plus its compressed variants, encoded on first use."""
+
+    def __init__(self, body: bytes, media_type: str = "application/json", generation: int = None):
+        self.body = body
+        self.media_type = media_type
+        self.generation = generation
+        self.created_at = time.monotonic()
+        self._encoded = {}
+
+    async def response(self, accept_encoding: Optional[str]) -> Response:
+        encoding = negotiate_encoding(accept_encoding) if len(self.body) >= COMPRESSION_MIN_SIZE else None
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding is None:
+            return Response(self.body, media_type=self.media_type, headers=headers)
+
+        if encoding not in self._encoded:
+            self._encoded[encoding] = await compress(encoding, self.body)
+        headers["Content-Encoding"] = encoding
+        return Response(self._encoded[encoding], media_type=self.media_type, headers=headers)
+
+class ResponseCache:
+    """Process-local cache of list response bodies, invalidated on writes and bounded by a TTL.
+
+    Entries may be tagged with the data generation they were built from (see cache_sync);
+    a lookup with a different generation is a miss, which covers writes made by other workers.
+    Every `fields=` combination is its own key, so entries are capped with an LRU.
+    """
+
+    def __init__(self):
+        self.ttl_seconds = float(os.getenv('LIST_CACHE_TTL_SECONDS', '10'))
+        self.max_entries = int(os.getenv('LIST_CACHE_MAX_ENTRIES', '64'))
+        self._entries = OrderedDict()
+
+    def get(self, key, generation: int = None) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.generation != generation or time.monotonic() - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, body: bytes, generation: int = None) -> CachedBody:
+        entry = CachedBody(body, generation=generation)
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, prefix: str):
+        for key in [k for k in self._entries if k[0] == prefix]:
+            del self._entries[key]
+
+list_cache = ResponseCache()
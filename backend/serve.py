@@ -0,0 +1,71 @@
+"""Production entry point: `python serve.py --workers 4`.
+
+`python server.py` remains the single-process development server with auto-reload.
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def preload():
+    """Import the app once in the parent so configuration errors fail fast, and build
+    indexes here instead of racing to do it in every worker.
+
+    Uses its own client: the app's client must stay usable in case the module is reused.
+    """
+    import server
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def _run():
+        options = server.mongo_client_options()
+        # Keep the app's pool and slow query monitors free of preload traffic
+        options.pop("event_listeners", None)
+        client = AsyncIOMotorClient(server.mongo_url, **options)
+        try:
+            database = client[server.db.name]
+            await server.ensure_indexes(database)
+            await database.command("ping")
+        finally:
+            client.close()
+
+    asyncio.run(_run())
+    os.environ['SKIP_STARTUP_INDEXES'] = '1'
+    logger.info("Preload complete: configuration valid, indexes ensured")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the complaint portal API with multiple workers")
+    parser.add_argument("--host", default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument("--workers", type=int, default=int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1))))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv('GRACEFUL_TIMEOUT', '30')))
+    parser.add_argument("--no-preload", action="store_true", help="Skip the preload step")
+    args = parser.parse_args()
+
+    # A single worker runs in this process and builds indexes in its own lifespan
+    if args.workers > 1 and not args.no_preload:
+        preload()
+
+    # uvloop is unavailable on Windows; fall back to the stock asyncio loop there
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        proxy_headers=True,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level="info",
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,111 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Query, Header, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 import logging
+import time
 from pathlib import Path
-from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator, TypeAdapter
+from typing import Any, Dict, List, Optional
 import uuid
-from datetime import datetime, timezone
-from auth_utils import hash_password, verify_password, create_access_token, decode_access_token
+from datetime import datetime, timedelta, timezone
+from auth_utils import (
+    hash_password, verify_password, create_access_token, decode_access_token,
+    create_refresh_token, hash_token, ACCESS_TOKEN_EXPIRE_MINUTES
+)
 from email_service import email_service
+from models import ComplaintStatus, LabComplaintCreate, ICCComplaintCreate
+import bulk_import
+from token_revocation import revocation_list
+from complaint_clustering import cluster_index
+from response_compression import CompressionMiddleware, list_cache
+from mongo_monitoring import pool_monitor, slow_query_recorder
+from complaint_tracking import TRACKING_PROJECTION, create_tracking_token, parse_tracking_token, tracking_cache
+from cache_sync import cache_generations
 import base64
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+
+def mongo_client_options():
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+        "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+        "socketTimeoutMS": int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '30000')),
+        "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+        "readPreference": os.environ.get('MONGO_READ_PREFERENCE', 'primary'),
+        "event_listeners": [pool_monitor, slow_query_recorder],
+    }
+    # e.g. "zstd,snappy,zlib" - the server negotiates the first one both sides support
+    if os.environ.get('MONGO_COMPRESSORS'):
+        options["compressors"] = os.environ['MONGO_COMPRESSORS']
+    return options
+
+client = AsyncIOMotorClient(mongo_url, **mongo_client_options())
 db = client[os.environ['DB_NAME']]
 
+async def ensure_indexes(database=None):
+    database = db if database is None else database
+    await database.refresh_tokens.create_index("token_hash", unique=True)
+    await database.refresh_tokens.create_index("expires_at", expireAfterSeconds=0)
+    await database.revoked_tokens.create_index("jti", unique=True)
+    await database.revoked_tokens.create_index("expires_at", expireAfterSeconds=0)
+    await database.lab_complaints.create_index("parent_id")
+    # Cluster index sync between workers reads recently updated complaints
+    await database.lab_complaints.create_index("updated_at")
+    # Work queue: next claimable complaint by priority (cluster size) then age, and "my queue"
+    await database.lab_complaints.create_index([("status", 1), ("duplicate_count", -1), ("created_at", 1)])
+    await database.lab_complaints.create_index([("claimed_by", 1), ("status", 1)])
+    await database.lab_complaints.create_index("id", unique=True)
+    await database.icc_complaints.create_index("id", unique=True)
+    await database.import_jobs.create_index("import_id", unique=True)
+    # Covers the public tracking lookup: filter and projection are both served from the index
+    for collection in (database.lab_complaints, database.icc_complaints):
+        await collection.create_index(
+            [("id", 1), ("tracking_token_hash", 1), ("status", 1), ("created_at", 1), ("updated_at", 1)],
+            name="tracking_lookup"
+        )
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # The production launcher builds indexes once before forking workers
+    if os.environ.get('SKIP_STARTUP_INDEXES') != '1':
+        await ensure_indexes()
+    slow_query_recorder.start(db)
+    # Load revocations before serving so logged-out tokens are never accepted at startup
+    await revocation_list.reload(db.revoked_tokens)
+    revocation_list.start(db.revoked_tokens)
+    await cluster_index.rebuild(db.lab_complaints)
+    cache_generations.start(db.cache_generations, sync_worker_state)
     yield
+    await cache_generations.stop()
+    await revocation_list.stop()
+    if import_executor is not None:
+        import_executor.shutdown(wait=False, cancel_futures=True)
     client.close()
 
+# Created on first bulk import so ordinary workers never spawn a process pool
+import_executor = None
+
 app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
+# Logout must work with an expired access token, or with only a refresh token
+optional_security = HTTPBearer(auto_error=False)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -58,26 +134,26 @@ class AdminLogin(BaseModel):
             raise ValueError('Email must end with @sies.edu.in')
         return v
 
-class LabComplaintCreate(BaseModel):
-    name: str
-    roll_number: str
-    stream: str
-    phone: str
-    email: EmailStr
-    lab_number: str
-    complaint: str
-    photo_base64: Optional[str] = None
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
-class ICCComplaintCreate(BaseModel):
-    name: str
-    roll_number: str
-    stream: str
-    phone: str
-    email: EmailStr
-    complaint: str
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+# Allowed status transitions: current status -> statuses it may move to
+STATUS_TRANSITIONS = {
+    "pending": {"in_progress", "resolved"},
+    "in_progress": {"pending", "resolved"},
+    "resolved": {"in_progress"},
+}
+
+def allowed_previous_statuses(status: str) -> List[str]:
+    return [current for current, targets in STATUS_TRANSITIONS.items() if status in targets]
 
 class StatusUpdate(BaseModel):
-    status: str
+    status: ComplaintStatus
+    # Version of the complaint the admin was looking at; omit to skip the concurrency check
+    version: Optional[int] = None
 
 class Complaint(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -92,6 +168,26 @@ class Complaint(BaseModel):
     created_at: datetime
     lab_number: Optional[str] = None
     photo_base64: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    parent_id: Optional[str] = None
+    duplicate_count: int = 0
+    version: int = 0
+    claimed_by: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+
+complaint_list_adapter = TypeAdapter(List[Complaint])
+sparse_list_adapter = TypeAdapter(List[Dict[str, Any]])
+
+class TrackingStatus(BaseModel):
+    complaint_id: str
+    status: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class ComplaintCluster(BaseModel):
+    parent: Complaint
+    duplicates: List[Complaint]
+    size: int
 
 class Admin(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -100,25 +196,89 @@ class Admin(BaseModel):
     name: str
 
 # Auth dependency
+# Access tokens carry every claim the dashboards need, so authorization is a signature check
+# plus an in-memory revocation lookup - no database round trip per request.
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security), admin_type: str = "lab"):
     token = credentials.credentials
     payload = decode_access_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    admin_id = payload.get("sub")
-    admin_type_from_token = payload.get("type")
-    
-    if admin_type_from_token != admin_type:
+    if payload.get("type") != admin_type:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    collection = db.lab_admins if admin_type == "lab" else db.icc_admins
-    admin = await collection.find_one({"id": admin_id}, {"_id": 0})
+    if not payload.get("jti") or revocation_list.is_revoked(payload["jti"]):
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    
+    return {"id": payload.get("sub"), "email": payload.get("email"), "name": payload.get("name")}
+
+async def issue_tokens(admin: dict, admin_type: str):
+    access_token = create_access_token({
+        "sub": admin["id"],
+        "type": admin_type,
+        "email": admin["email"],
+        "name": admin["name"]
+    })
+    refresh_token, expires_at = create_refresh_token()
+    
+    await db.refresh_tokens.insert_one({
+        "token_hash": hash_token(refresh_token),
+        "admin_id": admin["id"],
+        "type": admin_type,
+        "email": admin["email"],
+        "name": admin["name"],
+        "expires_at": expires_at
+    })
+    
+    return {
+        "token": access_token,
+        "refresh_token": refresh_token,
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "admin": {"id": admin["id"], "email": admin["email"], "name": admin["name"]}
+    }
+
+async def rotate_refresh_token(refresh_token: str, admin_type: str):
+    # Deleting on read makes every refresh token single-use
+    stored = await db.refresh_tokens.find_one_and_delete(
+        {"token_hash": hash_token(refresh_token), "type": admin_type},
+        projection={"_id": 0}
+    )
+    if not stored:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    
+    expires_at = stored["expires_at"]
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    
+    admin = {"id": stored["admin_id"], "email": stored["email"], "name": stored["name"]}
+    return await issue_tokens(admin, admin_type)
+
+async def logout_admin(credentials: Optional[HTTPAuthorizationCredentials], body: Optional[LogoutRequest], admin_type: str):
+    """Delete the refresh token and revoke the access token, whichever were presented.
+
+    The refresh token is itself a bearer secret, so it is deleted by its hash alone; an
+    idle admin whose access token has expired can still end the session. The access token
+    is decoded without the expiry check only to find its jti.
+    """
+    payload = decode_access_token(credentials.credentials, verify_exp=False) if credentials else None
+    if payload and payload.get("type") != admin_type:
+        payload = None
+    refresh_token = body.refresh_token if body else None
+    if not payload and not refresh_token:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    
+    if payload and payload.get("jti") and payload.get("exp"):
+        expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        # An expired token is already rejected everywhere; nothing to revoke
+        if expires_at > datetime.now(timezone.utc):
+            await revocation_list.revoke(db.revoked_tokens, payload["jti"], expires_at)
     
-    if not admin:
-        raise HTTPException(status_code=401, detail="Admin not found")
+    if refresh_token:
+        await db.refresh_tokens.delete_one({"token_hash": hash_token(refresh_token), "type": admin_type})
     
-    return admin
+    return {"message": "Logged out successfully"}
 
 async def get_current_lab_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     return await get_current_admin(credentials, "lab")
@@ -126,6 +286,177 @@ async def get_current_lab_admin(credentials: HTTPAuthorizationCredentials = Depe
 async def get_current_icc_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     return await get_current_admin(credentials, "icc")
 
+async def get_current_any_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = decode_access_token(credentials.credentials)
+    admin_type = payload.get("type") if payload else None
+    return await get_current_admin(credentials, admin_type if admin_type in ("lab", "icc") else "lab")
+
+# Complaint read helpers
+FieldsQuery = Query(None, description="Comma-separated Complaint fields to return, e.g. id,name,lab_number,status,created_at")
+
+def parse_fields(fields: Optional[str]):
+    """Validate a sparse fieldset against the Complaint model. Returns None for all fields."""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(Complaint.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(requested | {"id"}))
+
+def complaint_projection(selected):
+    if selected is None:
+        return {"_id": 0, "minhash": 0}
+    return {"_id": 0, **{f: 1 for f in selected}}
+
+def normalize_complaint(c: dict) -> dict:
+    for key in ('created_at', 'updated_at'):
+        if isinstance(c.get(key), str):
+            c[key] = datetime.fromisoformat(c[key])
+    return c
+
+async def list_complaints_response(collection, cache_prefix: str, request: Request, fields: Optional[str]):
+    selected = parse_fields(fields)
+    cache_key = (cache_prefix, selected)
+    # One point read keeps the cache consistent with writes made by any worker
+    generation = await cache_generations.current(cache_prefix)
+    cached = list_cache.get(cache_key, generation)
+    if cached is None:
+        complaints = await collection.find({}, complaint_projection(selected)).sort("created_at", -1).to_list(1000)
+        complaints = [normalize_complaint(c) for c in complaints]
+        
+        if selected is None:
+            body = complaint_list_adapter.dump_json(complaint_list_adapter.validate_python(complaints))
+        else:
+            body = sparse_list_adapter.dump_json(complaints)
+        cached = list_cache.set(cache_key, body, generation)
+    
+    return await cached.response(request.headers.get("accept-encoding"))
+
+async def complaints_changed(complaint_type: str, tracked_ids=()):
+    """Drop this worker's cached lists and signal the write to the other workers.
+
+    `tracked_ids` are complaints whose tracking lookup result changed (status or delete).
+    """
+    list_cache.invalidate(complaint_type)
+    for complaint_id in tracked_ids:
+        tracking_cache.invalidate(complaint_id)
+    await cache_generations.bump(complaint_type, tracked_ids)
+
+async def sync_worker_state(complaint_type: str, tracked_ids):
+    """Catch up with writes from any worker: runs shortly after each generation bump."""
+    if tracked_ids is None:
+        tracking_cache.clear()
+    else:
+        for complaint_id in tracked_ids:
+            tracking_cache.invalidate(complaint_id)
+    if complaint_type == "lab":
+        await cluster_index.sync(db.lab_complaints)
+
+async def get_complaint_or_404(collection, complaint_id: str, fields: Optional[str]):
+    selected = parse_fields(fields)
+    complaint = await collection.find_one({"id": complaint_id}, complaint_projection(selected))
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    
+    complaint = normalize_complaint(complaint)
+    if selected is None:
+        return Complaint.model_validate(complaint)
+    return complaint
+
+STATUS_PROJECTION = {"_id": 0, "id": 1, "email": 1, "name": 1, "status": 1, "version": 1, "parent_id": 1, "duplicate_count": 1, "updated_at": 1}
+
+async def transition_complaint_status(collection, complaint_id: str, status_update: StatusUpdate, projection: dict = STATUS_PROJECTION):
+    """Atomically apply a status transition in one round trip.
+
+    The update only matches while the complaint is in a status the state machine allows
+    to move to the new one (and, when given, still at the version the admin saw), so two
+    admins acting at once cannot overwrite each other. Returns the updated document.
+    """
+    query = {"id": complaint_id, "status": {"$in": allowed_previous_statuses(status_update.status)}}
+    if status_update.version is not None:
+        # Documents written before versioning have no version field and count as 0
+        query["version"] = status_update.version if status_update.version else {"$in": [0, None]}
+    
+    updated = await collection.find_one_and_update(
+        query,
+        {"$set": {"status": status_update.status, "updated_at": datetime.now(timezone.utc).isoformat()}, "$inc": {"version": 1}},
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
+    if updated:
+        return updated
+    
+    # Failure path only: tell a missing complaint, a forbidden transition and a lost race apart
+    current = await collection.find_one({"id": complaint_id}, {"_id": 0, "status": 1, "version": 1})
+    if not current:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    detail = {"status": current.get("status"), "version": current.get("version", 0)}
+    # A stale version means the status the admin acted on has changed: a race, even if the
+    # transition is also not allowed from the new status
+    stale = status_update.version is not None and status_update.version != detail["version"]
+    if not stale and status_update.status not in STATUS_TRANSITIONS.get(current.get("status"), ()):
+        raise HTTPException(status_code=422, detail={
+            "message": f"Cannot change status from {current.get('status')} to {status_update.status}",
+            **detail
+        })
+    raise HTTPException(status_code=409, detail={"message": "Complaint was modified by another admin", **detail})
+
+async def import_complaints_upload(complaint_type: str, file: UploadFile, import_id: Optional[str]):
+    global import_executor
+    try:
+        fmt = bulk_import.detect_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if import_executor is None:
+        # Spawn rather than fork: this process already runs an event loop and Motor threads
+        import_executor = ProcessPoolExecutor(
+            max_workers=int(os.environ.get('IMPORT_WORKERS', str(os.cpu_count() or 1))),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    
+    # A fresh id per upload unless the caller passes one back to resume an interrupted import
+    import_id = import_id or str(uuid.uuid4())
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        summary = await bulk_import.run_import(db, complaint_type, bulk_import.iter_records(stream, fmt), import_id, import_executor)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    finally:
+        stream.detach()
+        # Also after a failure, for the batches already committed. Every worker, this one
+        # included, indexes new lab rows in its next cluster sync.
+        await complaints_changed(complaint_type)
+    
+    summary["error_count"] = len(summary["errors"])
+    summary["errors"] = summary["errors"][:1000]
+    return summary
+
+CLAIM_LEASE_SECONDS = int(os.environ.get('CLAIM_LEASE_SECONDS', '900'))
+OPEN_STATUSES = ["pending", "in_progress"]
+
+async def claim_next_complaint(collection, admin_id: str):
+    """Atomically hand the highest-priority unclaimed (or lease-expired) complaint to an admin.
+
+    Priority is cluster size, then age. Only parent complaints are queued since a parent's
+    status cascades to its duplicates. Concurrent claimers never receive the same document.
+    """
+    now = datetime.now(timezone.utc)
+    return await collection.find_one_and_update(
+        {
+            "status": {"$in": OPEN_STATUSES},
+            "parent_id": None,
+            "$or": [{"claimed_by": None}, {"lease_expires_at": {"$lt": now}}]
+        },
+        {"$set": {"claimed_by": admin_id, "claimed_at": now, "lease_expires_at": now + timedelta(seconds=CLAIM_LEASE_SECONDS)}},
+        sort=[("duplicate_count", -1), ("created_at", 1)],
+        projection=complaint_projection(None),
+        return_document=ReturnDocument.AFTER
+    )
+
 # Lab Admin Routes
 @api_router.post("/auth/lab-admin/signup")
 async def lab_admin_signup(admin: AdminSignup):
@@ -146,8 +477,7 @@ async def lab_admin_signup(admin: AdminSignup):
     
     await db.lab_admins.insert_one(admin_doc)
     
-    token = create_access_token({"sub": admin_id, "type": "lab"})
-    return {"token": token, "admin": {"id": admin_id, "email": admin.email, "name": admin.name}}
+    return await issue_tokens(admin_doc, "lab")
 
 @api_router.post("/auth/lab-admin/login")
 async def lab_admin_login(credentials: AdminLogin):
@@ -155,8 +485,15 @@ async def lab_admin_login(credentials: AdminLogin):
     if not admin or not verify_password(credentials.password, admin["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    token = create_access_token({"sub": admin["id"], "type": "lab"})
-    return {"token": token, "admin": {"id": admin["id"], "email": admin["email"], "name": admin["name"]}}
+    return await issue_tokens(admin, "lab")
+
+@api_router.post("/auth/lab-admin/refresh")
+async def lab_admin_refresh(body: RefreshRequest):
+    return await rotate_refresh_token(body.refresh_token, "lab")
+
+@api_router.post("/auth/lab-admin/logout")
+async def lab_admin_logout(body: Optional[LogoutRequest] = None, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    return await logout_admin(credentials, body, "lab")
 
 # ICC Admin Routes
 @api_router.post("/auth/icc-admin/signup")
@@ -178,8 +515,7 @@ async def icc_admin_signup(admin: AdminSignup):
     
     await db.icc_admins.insert_one(admin_doc)
     
-    token = create_access_token({"sub": admin_id, "type": "icc"})
-    return {"token": token, "admin": {"id": admin_id, "email": admin.email, "name": admin.name}}
+    return await issue_tokens(admin_doc, "icc")
 
 @api_router.post("/auth/icc-admin/login")
 async def icc_admin_login(credentials: AdminLogin):
@@ -187,13 +523,35 @@ async def icc_admin_login(credentials: AdminLogin):
     if not admin or not verify_password(credentials.password, admin["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    token = create_access_token({"sub": admin["id"], "type": "icc"})
-    return {"token": token, "admin": {"id": admin["id"], "email": admin["email"], "name": admin["name"]}}
+    return await issue_tokens(admin, "icc")
+
+@api_router.post("/auth/icc-admin/refresh")
+async def icc_admin_refresh(body: RefreshRequest):
+    return await rotate_refresh_token(body.refresh_token, "icc")
+
+@api_router.post("/auth/icc-admin/logout")
+async def icc_admin_logout(body: Optional[LogoutRequest] = None, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    return await logout_admin(credentials, body, "icc")
 
 # Lab Complaint Routes
 @api_router.post("/lab-complaints")
-async def create_lab_complaint(complaint: LabComplaintCreate):
+async def create_lab_complaint(complaint: LabComplaintCreate, background_tasks: BackgroundTasks):
     complaint_id = str(uuid.uuid4())
+    tracking_token = create_tracking_token("lab")
+    
+    now = datetime.now(timezone.utc).isoformat()
+    
+    # Link near-duplicates (e.g. ten reports of the same dead projector) to the first open report
+    signature, parent_id = cluster_index.find_parent(complaint.lab_number, complaint.complaint)
+    if parent_id:
+        # Another worker may have resolved or deleted the parent since it was indexed here
+        result = await db.lab_complaints.update_one(
+            {"id": parent_id, "status": {"$in": OPEN_STATUSES}},
+            {"$inc": {"duplicate_count": 1}}
+        )
+        if result.matched_count == 0:
+            cluster_index.remove(parent_id)
+            parent_id = None
     
     complaint_doc = {
         "id": complaint_id,
@@ -206,64 +564,220 @@ async def create_lab_complaint(complaint: LabComplaintCreate):
         "complaint": complaint.complaint,
         "photo_base64": complaint.photo_base64,
         "status": "pending",
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "version": 0,
+        "tracking_token_hash": hash_token(tracking_token),
+        "created_at": now,
+        "updated_at": now
     }
+    if parent_id:
+        complaint_doc["parent_id"] = parent_id
+    if signature:
+        # Stored so other workers index this complaint without recomputing the signature
+        complaint_doc["minhash"] = list(signature)
     
     await db.lab_complaints.insert_one(complaint_doc)
+    await complaints_changed("lab")
+    cluster_index.add(complaint_id, complaint.lab_number, signature, parent_id)
+    background_tasks.add_task(
+        email_service.send_submission_email, complaint.email, "Lab", complaint.name, complaint_id, tracking_token
+    )
     
-    return {"message": "Complaint submitted successfully", "complaint_id": complaint_id}
+    return {
+        "message": "Complaint submitted successfully",
+        "complaint_id": complaint_id,
+        "tracking_token": tracking_token,
+        "parent_id": parent_id
+    }
+
+@api_router.post("/lab-complaints/import")
+async def import_lab_complaints(
+    file: UploadFile = File(...),
+    import_id: Optional[str] = Form(None),
+    admin: dict = Depends(get_current_lab_admin)
+):
+    return await import_complaints_upload("lab", file, import_id)
 
 @api_router.get("/lab-complaints", response_model=List[Complaint])
-async def get_lab_complaints(admin: dict = Depends(get_current_lab_admin)):
-    complaints = await db.lab_complaints.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
+async def get_lab_complaints(
+    request: Request,
+    fields: Optional[str] = FieldsQuery,
+    admin: dict = Depends(get_current_lab_admin)
+):
+    return await list_complaints_response(db.lab_complaints, "lab", request, fields)
+
+@api_router.post("/lab-complaints/claim", response_model=List[Complaint])
+async def claim_lab_complaints(
+    n: int = Query(1, ge=1, le=50, description="Number of complaints to claim"),
+    admin: dict = Depends(get_current_lab_admin)
+):
+    claimed = []
+    for _ in range(n):
+        complaint = await claim_next_complaint(db.lab_complaints, admin["id"])
+        if not complaint:
+            break
+        claimed.append(normalize_complaint(complaint))
+    
+    if claimed:
+        await complaints_changed("lab")
+    return claimed
+
+@api_router.get("/lab-complaints/mine", response_model=List[Complaint])
+async def get_my_lab_complaints(
+    fields: Optional[str] = FieldsQuery,
+    admin: dict = Depends(get_current_lab_admin)
+):
+    selected = parse_fields(fields)
+    complaints = await db.lab_complaints.find(
+        {
+            "claimed_by": admin["id"],
+            "status": {"$in": OPEN_STATUSES},
+            "lease_expires_at": {"$gt": datetime.now(timezone.utc)}
+        },
+        complaint_projection(selected)
+    ).sort("lease_expires_at", 1).to_list(1000)
+    
+    complaints = [normalize_complaint(c) for c in complaints]
+    if selected is None:
+        return complaints
+    return JSONResponse(jsonable_encoder(complaints))
+
+@api_router.post("/lab-complaints/{complaint_id}/renew")
+async def renew_lab_complaint_claim(complaint_id: str, admin: dict = Depends(get_current_lab_admin)):
+    lease_expires_at = datetime.now(timezone.utc) + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    result = await db.lab_complaints.update_one(
+        {"id": complaint_id, "claimed_by": admin["id"], "lease_expires_at": {"$gt": datetime.now(timezone.utc)}},
+        {"$set": {"lease_expires_at": lease_expires_at}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Complaint is not claimed by you or the lease has expired")
     
-    for c in complaints:
-        if isinstance(c.get('created_at'), str):
-            c['created_at'] = datetime.fromisoformat(c['created_at'])
+    await complaints_changed("lab")
+    return {"message": "Lease renewed", "lease_expires_at": lease_expires_at}
+
+@api_router.post("/lab-complaints/{complaint_id}/release")
+async def release_lab_complaint(complaint_id: str, admin: dict = Depends(get_current_lab_admin)):
+    result = await db.lab_complaints.update_one(
+        {"id": complaint_id, "claimed_by": admin["id"]},
+        {"$unset": {"claimed_by": "", "claimed_at": "", "lease_expires_at": ""}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Complaint is not claimed by you")
+    
+    await complaints_changed("lab")
+    return {"message": "Complaint released"}
+
+# Photos would be most of the bytes read for 1000 complaints, and clusters never show them
+CLUSTER_PROJECTION = {"_id": 0, "minhash": 0, "photo_base64": 0, "tracking_token_hash": 0}
+
+@api_router.get("/lab-complaints/clusters", response_model=List[ComplaintCluster])
+async def get_lab_complaint_clusters(admin: dict = Depends(get_current_lab_admin)):
+    complaints = await db.lab_complaints.find({}, CLUSTER_PROJECTION).sort("created_at", -1).to_list(1000)
     
-    return complaints
+    by_id = {c["id"]: normalize_complaint(c) for c in complaints}
+    
+    clusters = {}
+    for c in complaints:
+        parent_id = c.get("parent_id")
+        if parent_id in by_id:
+            clusters.setdefault(parent_id, []).append(c)
+        else:
+            clusters.setdefault(c["id"], [])
+    
+    return [
+        {"parent": by_id[parent_id], "duplicates": duplicates, "size": len(duplicates) + 1}
+        for parent_id, duplicates in clusters.items()
+    ]
+
+@api_router.get("/lab-complaints/{complaint_id}")
+async def get_lab_complaint(
+    complaint_id: str,
+    fields: Optional[str] = FieldsQuery,
+    admin: dict = Depends(get_current_lab_admin)
+):
+    return await get_complaint_or_404(db.lab_complaints, complaint_id, fields)
+
+def send_lab_status_email(recipient: dict, status: str):
+    email_sent = email_service.send_status_update_email(
+        to_email=recipient["email"],
+        complaint_type="Lab",
+        student_name=recipient["name"],
+        status=status,
+        complaint_id=recipient["id"]
+    )
+    print(f"Email notification for {recipient['id']}: {'Success' if email_sent else 'Failed'}")
 
 @api_router.patch("/lab-complaints/{complaint_id}/status")
 async def update_lab_complaint_status(
     complaint_id: str,
     status_update: StatusUpdate,
+    background_tasks: BackgroundTasks,
     admin: dict = Depends(get_current_lab_admin)
 ):
-    complaint = await db.lab_complaints.find_one({"id": complaint_id}, {"_id": 0})
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    
-    await db.lab_complaints.update_one(
-        {"id": complaint_id},
-        {"$set": {"status": status_update.status}}
+    # Lab text is needed to re-index complaints reopened from resolved
+    complaint = await transition_complaint_status(
+        db.lab_complaints, complaint_id, status_update,
+        projection={**STATUS_PROJECTION, "lab_number": 1, "complaint": 1}
     )
     
-    email_sent = email_service.send_status_update_email(
-        to_email=complaint["email"],
-        complaint_type="Lab",
-        student_name=complaint["name"],
-        status=status_update.status,
-        complaint_id=complaint_id
-    )
-    print(f"Email notification for {complaint_id}: {'Success' if email_sent else 'Failed'}")
-    
-    return {"message": "Status updated successfully"}
+    # Updating a parent complaint cascades the status to every linked duplicate
+    recipients = [complaint]
+    if complaint.get("duplicate_count"):
+        previous = allowed_previous_statuses(status_update.status)
+        duplicates = await db.lab_complaints.find(
+            {"parent_id": complaint_id, "status": {"$in": previous}},
+            {"_id": 0, "id": 1, "email": 1, "name": 1, "parent_id": 1, "lab_number": 1, "complaint": 1}
+        ).to_list(None)
+        if duplicates:
+            await db.lab_complaints.update_many(
+                {"id": {"$in": [d["id"] for d in duplicates]}, "status": {"$in": previous}},
+                {"$set": {"status": status_update.status, "updated_at": complaint.get("updated_at")}, "$inc": {"version": 1}}
+            )
+            recipients += duplicates
+    await complaints_changed("lab", [r["id"] for r in recipients])
+    
+    if status_update.status == "resolved":
+        for r in recipients:
+            cluster_index.remove(r["id"])
+    else:
+        # Reopened complaints rejoin the index; the parent comes first so duplicates link to it
+        for r in recipients:
+            if r["id"] not in cluster_index and r.get("lab_number"):
+                signature = cluster_index.hasher.signature(r.get("complaint", ""))
+                cluster_index.add(r["id"], r["lab_number"], signature, r.get("parent_id"))
+    
+    # One SMTP session per student in the cluster; sent after the response, off the event loop
+    for r in recipients:
+        background_tasks.add_task(send_lab_status_email, r, status_update.status)
+    
+    return {"message": "Status updated successfully", "updated_count": len(recipients), "version": complaint["version"]}
 
 @api_router.delete("/lab-complaints/{complaint_id}")
 async def delete_lab_complaint(
     complaint_id: str,
     admin: dict = Depends(get_current_lab_admin)
 ):
-    result = await db.lab_complaints.delete_one({"id": complaint_id})
-    if result.deleted_count == 0:
+    deleted = await db.lab_complaints.find_one_and_delete(
+        {"id": complaint_id},
+        projection={"_id": 0, "parent_id": 1, "duplicate_count": 1}
+    )
+    if not deleted:
         raise HTTPException(status_code=404, detail="Complaint not found")
+    await complaints_changed("lab", [complaint_id])
+    
+    if deleted.get("parent_id"):
+        await db.lab_complaints.update_one({"id": deleted["parent_id"]}, {"$inc": {"duplicate_count": -1}})
+    elif deleted.get("duplicate_count"):
+        # Duplicates of a deleted parent become standalone complaints
+        await db.lab_complaints.update_many({"parent_id": complaint_id}, {"$unset": {"parent_id": ""}})
+    cluster_index.remove(complaint_id)
     
     return {"message": "Complaint deleted successfully"}
 
 # ICC Complaint Routes
 @api_router.post("/icc-complaints")
-async def create_icc_complaint(complaint: ICCComplaintCreate):
+async def create_icc_complaint(complaint: ICCComplaintCreate, background_tasks: BackgroundTasks):
     complaint_id = str(uuid.uuid4())
+    tracking_token = create_tracking_token("icc")
     
     complaint_doc = {
         "id": complaint_id,
@@ -274,39 +788,56 @@ async def create_icc_complaint(complaint: ICCComplaintCreate):
         "email": complaint.email,
         "complaint": complaint.complaint,
         "status": "pending",
+        "version": 0,
+        "tracking_token_hash": hash_token(tracking_token),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.icc_complaints.insert_one(complaint_doc)
+    await complaints_changed("icc")
+    background_tasks.add_task(
+        email_service.send_submission_email, complaint.email, "ICC", complaint.name, complaint_id, tracking_token
+    )
     
-    return {"message": "Complaint submitted successfully", "complaint_id": complaint_id}
+    return {"message": "Complaint submitted successfully", "complaint_id": complaint_id, "tracking_token": tracking_token}
+
+@api_router.post("/icc-complaints/import")
+async def import_icc_complaints(
+    file: UploadFile = File(...),
+    import_id: Optional[str] = Form(None),
+    admin: dict = Depends(get_current_icc_admin)
+):
+    return await import_complaints_upload("icc", file, import_id)
 
 @api_router.get("/icc-complaints", response_model=List[Complaint])
-async def get_icc_complaints(admin: dict = Depends(get_current_icc_admin)):
-    complaints = await db.icc_complaints.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    for c in complaints:
-        if isinstance(c.get('created_at'), str):
-            c['created_at'] = datetime.fromisoformat(c['created_at'])
-    
-    return complaints
+async def get_icc_complaints(
+    request: Request,
+    fields: Optional[str] = FieldsQuery,
+    admin: dict = Depends(get_current_icc_admin)
+):
+    return await list_complaints_response(db.icc_complaints, "icc", request, fields)
+
+@api_router.get("/icc-complaints/{complaint_id}")
+async def get_icc_complaint(
+    complaint_id: str,
+    fields: Optional[str] = FieldsQuery,
+    admin: dict = Depends(get_current_icc_admin)
+):
+    return await get_complaint_or_404(db.icc_complaints, complaint_id, fields)
 
 @api_router.patch("/icc-complaints/{complaint_id}/status")
 async def update_icc_complaint_status(
     complaint_id: str,
     status_update: StatusUpdate,
+    background_tasks: BackgroundTasks,
     admin: dict = Depends(get_current_icc_admin)
 ):
-    complaint = await db.icc_complaints.find_one({"id": complaint_id}, {"_id": 0})
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    
-    await db.icc_complaints.update_one(
-        {"id": complaint_id},
-        {"$set": {"status": status_update.status}}
-    )
+    complaint = await transition_complaint_status(db.icc_complaints, complaint_id, status_update)
+    await complaints_changed("icc", [complaint_id])
     
-    email_service.send_status_update_email(
+    # smtplib blocks, so send after the response like the lab handler does
+    background_tasks.add_task(
+        email_service.send_status_update_email,
         to_email=complaint["email"],
         complaint_type="ICC",
         student_name=complaint["name"],
@@ -314,7 +845,7 @@ async def update_icc_complaint_status(
         complaint_id=complaint_id
     )
     
-    return {"message": "Status updated successfully"}
+    return {"message": "Status updated successfully", "version": complaint["version"]}
 
 @api_router.delete("/icc-complaints/{complaint_id}")
 async def delete_icc_complaint(
@@ -324,11 +855,81 @@ async def delete_icc_complaint(
     result = await db.icc_complaints.delete_one({"id": complaint_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Complaint not found")
+    await complaints_changed("icc", [complaint_id])
     
     return {"message": "Complaint deleted successfully"}
 
+# Readiness probe: Mongo ping latency plus connection pool saturation for this worker
+@app.get("/health/ready")
+async def health_ready():
+    pool = pool_monitor.snapshot()
+    saturation = pool["checked_out"] / MONGO_MAX_POOL_SIZE if MONGO_MAX_POOL_SIZE else 0.0
+    report = {
+        "status": "ready",
+        "pool": {**pool, "max_size": MONGO_MAX_POOL_SIZE, "saturation": round(saturation, 3)},
+        "mongo": {}
+    }
+    
+    try:
+        start = time.perf_counter()
+        await db.command("ping")
+        report["mongo"]["ping_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    except Exception as e:
+        report["status"] = "unavailable"
+        report["mongo"]["error"] = str(e)
+        return JSONResponse(report, status_code=503)
+    
+    if saturation >= float(os.environ.get('POOL_SATURATION_THRESHOLD', '0.9')):
+        report["status"] = "saturated"
+        return JSONResponse(report, status_code=503)
+    
+    return report
+
+# Public Tracking Route
+# The token travels in a header rather than the query string so it stays out of access logs
+@api_router.get("/track/{complaint_id}", response_model=TrackingStatus)
+async def track_complaint(
+    complaint_id: str,
+    tracking_token: str = Header(..., alias="X-Tracking-Token", description="Tracking token returned at submission")
+):
+    complaint_type, token_hash = parse_tracking_token(tracking_token)
+    if complaint_type is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    
+    collection = db.lab_complaints if complaint_type == "lab" else db.icc_complaints
+    
+    async def load():
+        return await collection.find_one({"id": complaint_id, "tracking_token_hash": token_hash}, TRACKING_PROJECTION)
+    
+    complaint = await tracking_cache.get_or_load(complaint_id, token_hash, load)
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    
+    complaint = normalize_complaint(dict(complaint))
+    return {
+        "complaint_id": complaint["id"],
+        "status": complaint["status"],
+        "created_at": complaint["created_at"],
+        "updated_at": complaint.get("updated_at")
+    }
+
+# Diagnostics
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(admin: dict = Depends(get_current_any_admin)):
+    return {
+        "threshold_ms": slow_query_recorder.threshold_ms,
+        "shapes": slow_query_recorder.report()
+    }
+
+@api_router.delete("/admin/slow-queries")
+async def reset_slow_queries(admin: dict = Depends(get_current_any_admin)):
+    slow_query_recorder.reset()
+    return {"message": "Slow query log cleared"}
+
 app.include_router(api_router)
 
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -0,0 +1,64 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RevocationList:
+    """In-memory set of revoked access token ids (jti).
+
+    The set is reloaded from the `revoked_tokens` collection in the background so that
+    request authorization never has to touch Mongo. Revocations made by this process are
+    visible immediately; revocations made by other workers within `refresh_seconds`.
+    """
+
+    def __init__(self):
+        self.refresh_seconds = float(os.getenv('REVOCATION_REFRESH_SECONDS', '30'))
+        self._revoked = set()
+        # jti -> expiry for revocations made by this process, merged into every reload so a
+        # reload racing with revoke() cannot drop them
+        self._local = {}
+        self._task = None
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    async def revoke(self, collection, jti: str, expires_at: datetime):
+        self._revoked.add(jti)
+        self._local[jti] = expires_at
+        await collection.update_one(
+            {"jti": jti},
+            {"$set": {"jti": jti, "expires_at": expires_at}},
+            upsert=True
+        )
+
+    async def reload(self, collection):
+        now = datetime.now(timezone.utc)
+        docs = await collection.find({"expires_at": {"$gt": now}}, {"_id": 0, "jti": 1}).to_list(None)
+        self._local = {jti: exp for jti, exp in self._local.items() if exp > datetime.now(timezone.utc)}
+        self._revoked = {d["jti"] for d in docs} | set(self._local)
+
+    async def _run(self, collection):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.reload(collection)
+            except Exception as e:
+                logger.error(f"Failed to refresh token revocation list: {str(e)}")
+
+    def start(self, collection):
+        """Schedule background reloads; await `reload()` once before this at startup."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(collection))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+revocation_list = RevocationList()
@@ -8,6 +8,7 @@ import ICCComplaintForm from "./pages/ICCComplaintForm";
 import AdminAuth from "./pages/AdminAuth";
 import LabAdminDashboard from "./pages/LabAdminDashboard";
 import ICCAdminDashboard from "./pages/ICCAdminDashboard";
+import TrackComplaint from "./pages/TrackComplaint";
 import ProtectedRoute from "./components/ProtectedRoute";
 
 function App() {
@@ -20,6 +21,8 @@ function App() {
           <Route path="/icc/role" element={<RoleSelection type="icc" />} />
           <Route path="/lab/student" element={<LabComplaintForm />} />
           <Route path="/icc/student" element={<ICCComplaintForm />} />
+          <Route path="/track" element={<TrackComplaint />} />
+          <Route path="/track/:complaintId" element={<TrackComplaint />} />
           <Route path="/lab/admin/auth" element={<AdminAuth type="lab" />} />
           <Route path="/icc/admin/auth" element={<AdminAuth type="icc" />} />
           <Route
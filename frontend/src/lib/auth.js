@@ -0,0 +1,78 @@
+import axios from "axios";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// Access tokens are short-lived; when an admin request comes back 401 we rotate the
+// refresh token once and replay the original request with the new access token.
+const adminTypeForUrl = (url = "") => {
+  if (url.includes("/api/lab-")) return "lab";
+  if (url.includes("/api/icc-")) return "icc";
+  return null;
+};
+
+const pendingRefresh = {};
+
+const refreshAccessToken = (type) => {
+  if (!pendingRefresh[type]) {
+    const refreshToken = localStorage.getItem(`${type}_admin_refresh_token`);
+    pendingRefresh[type] = (refreshToken
+      ? axios.post(`${BACKEND_URL}/api/auth/${type}-admin/refresh`, { refresh_token: refreshToken })
+      : Promise.reject(new Error("No refresh token"))
+    )
+      .then((response) => {
+        storeAdminSession(type, response.data);
+        return response.data.token;
+      })
+      .finally(() => {
+        delete pendingRefresh[type];
+      });
+  }
+  return pendingRefresh[type];
+};
+
+export const storeAdminSession = (type, data) => {
+  localStorage.setItem(`${type}_admin_token`, data.token);
+  localStorage.setItem(`${type}_admin_refresh_token`, data.refresh_token);
+  localStorage.setItem(`${type}_admin_data`, JSON.stringify(data.admin));
+};
+
+export const clearAdminSession = async (type) => {
+  const token = localStorage.getItem(`${type}_admin_token`);
+  const refreshToken = localStorage.getItem(`${type}_admin_refresh_token`);
+  localStorage.removeItem(`${type}_admin_token`);
+  localStorage.removeItem(`${type}_admin_refresh_token`);
+  localStorage.removeItem(`${type}_admin_data`);
+  if (token || refreshToken) {
+    try {
+      // The server accepts an expired access token here; the refresh token alone ends the session
+      await axios.post(
+        `${BACKEND_URL}/api/auth/${type}-admin/logout`,
+        { refresh_token: refreshToken },
+        { headers: token ? { Authorization: `Bearer ${token}` } : {}, _skipRefresh: true }
+      );
+    } catch (error) {
+      // The local session is already gone; nothing else to clean up.
+    }
+  }
+};
+
+export const setupAuthRefresh = () => {
+  axios.interceptors.response.use(undefined, async (error) => {
+    const config = error.config;
+    const type = adminTypeForUrl(config?.url);
+    if (error.response?.status !== 401 || !type || config._retried || config._skipRefresh) {
+      return Promise.reject(error);
+    }
+    try {
+      const token = await refreshAccessToken(type);
+      config._retried = true;
+      config.headers = { ...config.headers, Authorization: `Bearer ${token}` };
+      return axios(config);
+    } catch (refreshError) {
+      localStorage.removeItem(`${type}_admin_token`);
+      localStorage.removeItem(`${type}_admin_refresh_token`);
+      window.location.assign(`/${type}/admin/auth`);
+      return Promise.reject(error);
+    }
+  });
+};
@@ -12,6 +12,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from "../components/ui/tabs"
 import axios from "axios";
 
 import SiesLogo from "../components/SiesLogo";
+import { storeAdminSession } from "../lib/auth";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -60,8 +61,7 @@ const AdminAuth = ({ type }) => {
       const response = await axios.post(url, payload);
 
       if (activeTab === "login") {
-        localStorage.setItem(`${type}_admin_token`, response.data.token);
-        localStorage.setItem(`${type}_admin_data`, JSON.stringify(response.data.admin));
+        storeAdminSession(type, response.data);
 
         toast.success("Login successful!");
         reset();
@@ -13,6 +13,7 @@ import {
 import { LogOut, LayoutDashboard, Scale, Trash2 } from "lucide-react";
 import axios from "axios";
 import SiesLogo from "../components/SiesLogo";
+import { clearAdminSession } from "../lib/auth";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -44,18 +45,25 @@ const ICCAdminDashboard = () => {
     }
   };
 
-  const handleStatusChange = async (complaintId, newStatus) => {
+  const handleStatusChange = async (complaint, newStatus) => {
     try {
       const token = localStorage.getItem("icc_admin_token");
       await axios.patch(
-        `${BACKEND_URL}/api/icc-complaints/${complaintId}/status`,
-        { status: newStatus },
+        `${BACKEND_URL}/api/icc-complaints/${complaint.id}/status`,
+        { status: newStatus, version: complaint.version },
         { headers: { Authorization: `Bearer ${token}` } }
       );
       toast.success("Status updated successfully. Email sent to student.");
       fetchComplaints();
     } catch (error) {
-      toast.error("Failed to update status");
+      if (error.response?.status === 409) {
+        toast.error(error.response.data.detail?.message || "Complaint was modified by another admin");
+        fetchComplaints();
+      } else if (error.response?.status === 422 && error.response.data.detail?.message) {
+        toast.error(error.response.data.detail.message);
+      } else {
+        toast.error("Failed to update status");
+      }
     }
   };
 
@@ -75,9 +83,8 @@ const ICCAdminDashboard = () => {
     }
   };
 
-  const handleLogout = () => {
-    localStorage.removeItem("icc_admin_token");
-    localStorage.removeItem("icc_admin_data");
+  const handleLogout = async () => {
+    await clearAdminSession("icc");
     toast.success("Logged out successfully");
     navigate("/icc/admin/auth");
   };
@@ -238,7 +245,7 @@ const ICCAdminDashboard = () => {
                     <span className="text-sm text-slate-500 dark:text-slate-400 hidden sm:inline">Update:</span>
                     <Select
                       value={complaint.status}
-                      onValueChange={(value) => handleStatusChange(complaint.id, value)}
+                      onValueChange={(value) => handleStatusChange(complaint, value)}
                     >
                       <SelectTrigger className="w-full sm:w-[180px] bg-white dark:bg-slate-800 border-slate-200 dark:border-slate-700 text-slate-900 dark:text-slate-100" data-testid="status-select">
                         <SelectValue />
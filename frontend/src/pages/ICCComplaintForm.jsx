@@ -39,11 +39,15 @@ const ICCComplaintForm = () => {
   const onSubmit = async (data) => {
     setIsSubmitting(true);
     try {
-      await axios.post(`${BACKEND_URL}/api/icc-complaints`, data);
+      const response = await axios.post(`${BACKEND_URL}/api/icc-complaints`, data);
 
-      toast.success("Complaint submitted successfully! You'll receive email updates.");
+      toast.success("Complaint submitted successfully! You'll receive email updates.", {
+        description: "Your tracking link has been emailed to you. Bookmark this page to check the status any time.",
+        duration: 15000,
+      });
       reset();
-      setTimeout(() => navigate("/"), 2000);
+      const { complaint_id, tracking_token } = response.data;
+      navigate(`/track/${complaint_id}#${encodeURIComponent(tracking_token)}`);
     } catch (error) {
       toast.error(error.response?.data?.detail || "Failed to submit complaint");
     } finally {
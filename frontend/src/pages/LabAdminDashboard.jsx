@@ -13,6 +13,7 @@ import {
 import { LogOut, LayoutDashboard, Monitor, Trash2 } from "lucide-react";
 import axios from "axios";
 import SiesLogo from "../components/SiesLogo";
+import { clearAdminSession } from "../lib/auth";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -44,18 +45,34 @@ const LabAdminDashboard = () => {
     }
   };
 
-  const handleStatusChange = async (complaintId, newStatus) => {
+  const handleStatusChange = async (complaint, newStatus) => {
+    // A parent's status cascades to every linked duplicate, and each of those students is emailed
+    if (
+      complaint.duplicate_count > 0 &&
+      !window.confirm(
+        `This complaint has ${complaint.duplicate_count} linked duplicate(s). Their status will change too and those students will be emailed. Continue?`
+      )
+    ) {
+      return;
+    }
     try {
       const token = localStorage.getItem("lab_admin_token");
       await axios.patch(
-        `${BACKEND_URL}/api/lab-complaints/${complaintId}/status`,
-        { status: newStatus },
+        `${BACKEND_URL}/api/lab-complaints/${complaint.id}/status`,
+        { status: newStatus, version: complaint.version },
         { headers: { Authorization: `Bearer ${token}` } }
       );
       toast.success("Status updated successfully. Email sent to student.");
       fetchComplaints();
     } catch (error) {
-      toast.error("Failed to update status");
+      if (error.response?.status === 409) {
+        toast.error(error.response.data.detail?.message || "Complaint was modified by another admin");
+        fetchComplaints();
+      } else if (error.response?.status === 422 && error.response.data.detail?.message) {
+        toast.error(error.response.data.detail.message);
+      } else {
+        toast.error("Failed to update status");
+      }
     }
   };
 
@@ -75,9 +92,8 @@ const LabAdminDashboard = () => {
     }
   };
 
-  const handleLogout = () => {
-    localStorage.removeItem("lab_admin_token");
-    localStorage.removeItem("lab_admin_data");
+  const handleLogout = async () => {
+    await clearAdminSession("lab");
     toast.success("Logged out successfully");
     navigate("/lab/admin/auth");
   };
@@ -226,6 +242,14 @@ const LabAdminDashboard = () => {
                   </div>
                 )}
 
+                {(complaint.parent_id || complaint.duplicate_count > 0) && (
+                  <div className="mb-6 bg-amber-50 dark:bg-amber-900/20 px-4 py-3 rounded-xl border border-amber-200 dark:border-amber-800 text-sm text-amber-800 dark:text-amber-300" data-testid="complaint-cluster">
+                    {complaint.parent_id
+                      ? `Linked as a duplicate of complaint ${complaint.parent_id.slice(0, 8)}; it follows that complaint's status.`
+                      : `${complaint.duplicate_count} linked duplicate(s) will follow this complaint's status.`}
+                  </div>
+                )}
+
                 <div className="flex flex-col sm:flex-row items-center justify-between pt-4 border-t border-slate-200 dark:border-slate-700/50 gap-4">
                   <div className="flex items-center gap-3 bg-white dark:bg-slate-800 px-3 py-2 rounded-lg border border-slate-100 dark:border-slate-700 w-full sm:w-auto justify-center sm:justify-start">
                     <span className="text-sm text-slate-500 dark:text-slate-400">Current Status:</span>
@@ -252,7 +276,7 @@ const LabAdminDashboard = () => {
                     <span className="text-sm text-slate-500 dark:text-slate-400 hidden sm:inline">Update:</span>
                     <Select
                       value={complaint.status}
-                      onValueChange={(value) => handleStatusChange(complaint.id, value)}
+                      onValueChange={(value) => handleStatusChange(complaint, value)}
                     >
                       <SelectTrigger className="w-full sm:w-[180px] bg-white dark:bg-slate-800 border-slate-200 dark:border-slate-700 text-slate-900 dark:text-slate-100" data-testid="status-select">
                         <SelectValue />
@@ -68,16 +68,20 @@ const LabComplaintForm = () => {
         });
       }
 
-      await axios.post(`${BACKEND_URL}/api/lab-complaints`, {
+      const response = await axios.post(`${BACKEND_URL}/api/lab-complaints`, {
         ...data,
         photo_base64: photoBase64,
       });
 
-      toast.success("Complaint submitted successfully! You'll receive email updates.");
+      toast.success("Complaint submitted successfully! You'll receive email updates.", {
+        description: "Your tracking link has been emailed to you. Bookmark this page to check the status any time.",
+        duration: 15000,
+      });
       reset();
       setPhotoFile(null);
       setPhotoPreview(null);
-      setTimeout(() => navigate("/"), 2000);
+      const { complaint_id, tracking_token } = response.data;
+      navigate(`/track/${complaint_id}#${encodeURIComponent(tracking_token)}`);
     } catch (error) {
       toast.error(error.response?.data?.detail || "Failed to submit complaint");
     } finally {
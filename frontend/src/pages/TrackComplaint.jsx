@@ -0,0 +1,141 @@
+import { useEffect, useState } from "react";
+import { useLocation, useNavigate, useParams } from "react-router-dom";
+import { toast } from "sonner";
+import { Button } from "../components/ui/button";
+import { Input } from "../components/ui/input";
+import { Label } from "../components/ui/label";
+import { Card } from "../components/ui/card";
+import axios from "axios";
+import SiesLogo from "../components/SiesLogo";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+const STATUS_STYLES = {
+  pending: "bg-amber-100 text-amber-800 border-amber-200",
+  in_progress: "bg-blue-100 text-blue-800 border-blue-200",
+  resolved: "bg-green-100 text-green-800 border-green-200",
+};
+
+// Links from the confirmation email look like /track/<complaint id>#<tracking code>; the
+// code stays in the fragment so it never reaches a server log, and is sent as a header.
+const TrackComplaint = () => {
+  const navigate = useNavigate();
+  const location = useLocation();
+  const params = useParams();
+  const [complaintId, setComplaintId] = useState(params.complaintId || "");
+  const [trackingCode, setTrackingCode] = useState(decodeURIComponent(location.hash.slice(1)));
+  const [result, setResult] = useState(null);
+  const [isLoading, setIsLoading] = useState(false);
+
+  const track = async (id, code) => {
+    if (!id || !code) {
+      toast.error("Enter your complaint ID and tracking code");
+      return;
+    }
+    setIsLoading(true);
+    try {
+      const response = await axios.get(`${BACKEND_URL}/api/track/${encodeURIComponent(id.trim())}`, {
+        headers: { "X-Tracking-Token": code.trim() },
+      });
+      setResult(response.data);
+    } catch (error) {
+      setResult(null);
+      toast.error(error.response?.status === 404 ? "No complaint matches this ID and tracking code" : "Failed to fetch status");
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    if (params.complaintId && location.hash.length > 1) {
+      track(params.complaintId, decodeURIComponent(location.hash.slice(1)));
+    }
+    // Only on first load, when opened from the emailed link
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
+  const onSubmit = (e) => {
+    e.preventDefault();
+    track(complaintId, trackingCode);
+  };
+
+  return (
+    <div className="min-h-screen bg-gradient-to-br from-sky-300 via-blue-200 to-indigo-300 dark:from-slate-950 dark:via-slate-900 dark:to-blue-950 flex flex-col relative overflow-hidden font-sans transition-colors duration-500">
+      <div className="w-full p-3 md:p-4 z-50">
+        <div className="bg-white/70 backdrop-blur-xl rounded-2xl shadow-xl border border-white/40 p-4 md:px-8 relative flex items-center justify-center transition-all duration-300 min-h-[88px]">
+          <div className="absolute left-4 md:left-8 top-1/2 -translate-y-1/2 bg-white/50 rounded-lg p-1 backdrop-blur-sm">
+            <SiesLogo className="!p-0" />
+          </div>
+          <h1 className="text-2xl md:text-3xl font-bold text-slate-900 tracking-tight text-center pl-16 pr-4 md:px-0">
+            Track Your Complaint
+          </h1>
+        </div>
+      </div>
+
+      <div className="flex-1 flex flex-col items-center justify-center p-4 relative z-10">
+        <div className="max-w-xl w-full">
+          <Card className="p-8 md:p-10 bg-white/60 backdrop-blur-md border-white/40 shadow-xl">
+            <form onSubmit={onSubmit} className="space-y-6">
+              <div className="space-y-2">
+                <Label htmlFor="complaint_id" className="text-slate-700 font-medium">Complaint ID</Label>
+                <Input
+                  id="complaint_id"
+                  value={complaintId}
+                  onChange={(e) => setComplaintId(e.target.value)}
+                  placeholder="From your confirmation email"
+                  className="bg-white/50 border-slate-200 focus:border-blue-500 focus:ring-blue-500/20"
+                />
+              </div>
+
+              <div className="space-y-2">
+                <Label htmlFor="tracking_code" className="text-slate-700 font-medium">Tracking Code</Label>
+                <Input
+                  id="tracking_code"
+                  value={trackingCode}
+                  onChange={(e) => setTrackingCode(e.target.value)}
+                  placeholder="e.g., lab.XXXXXXXX"
+                  className="bg-white/50 border-slate-200 focus:border-blue-500 focus:ring-blue-500/20"
+                />
+              </div>
+
+              {result && (
+                <div className="bg-slate-50 p-4 rounded-xl border border-slate-100 space-y-2" data-testid="tracking-result">
+                  <div className="flex items-center gap-3">
+                    <span className="text-sm text-slate-500">Status:</span>
+                    <span className={`px-3 py-1 rounded-full text-xs font-bold border ${STATUS_STYLES[result.status] || STATUS_STYLES.pending}`}>
+                      {result.status.replace("_", " ").toUpperCase()}
+                    </span>
+                  </div>
+                  <p className="text-sm text-slate-600">Submitted: {new Date(result.created_at).toLocaleString()}</p>
+                  {result.updated_at && (
+                    <p className="text-sm text-slate-600">Last updated: {new Date(result.updated_at).toLocaleString()}</p>
+                  )}
+                </div>
+              )}
+
+              <div className="flex gap-4 pt-2">
+                <Button
+                  type="submit"
+                  disabled={isLoading}
+                  className="flex-1 bg-gradient-to-r from-blue-600 to-indigo-600 hover:from-blue-700 hover:to-indigo-700 text-white py-6 text-lg rounded-xl shadow-lg shadow-blue-500/20 transition-all hover:scale-[1.02]"
+                >
+                  {isLoading ? "Checking..." : "Check Status"}
+                </Button>
+                <Button
+                  type="button"
+                  variant="outline"
+                  onClick={() => navigate("/")}
+                  className="py-6 text-base rounded-xl border-slate-300 hover:bg-slate-100/50"
+                >
+                  Home
+                </Button>
+              </div>
+            </form>
+          </Card>
+        </div>
+      </div>
+    </div>
+  );
+};
+
+export default TrackComplaint;
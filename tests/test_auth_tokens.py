@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import server
+from auth_utils import create_access_token, hash_token
+from server import LogoutRequest, logout_admin, rotate_refresh_token
+from token_revocation import RevocationList
+
+ADMIN = {"id": "admin-1", "email": "admin@sies.edu.in", "name": "Admin"}
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length):
+        return list(self._docs)
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+
+    def _matches(self, doc, query):
+        for key, value in query.items():
+            if isinstance(value, dict) and "$gt" in value:
+                if not doc.get(key) or doc[key] <= value["$gt"]:
+                    return False
+            elif doc.get(key) != value:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        return FakeCursor([d for d in self.docs if self._matches(d, query)])
+
+    async def find_one_and_delete(self, query, projection=None):
+        for doc in self.docs:
+            if self._matches(doc, query):
+                self.docs.remove(doc)
+                return doc
+        return None
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def delete_one(self, query):
+        for doc in self.docs:
+            if self._matches(doc, query):
+                self.docs.remove(doc)
+                return
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.append(dict(update["$set"]))
+
+class FakeDB:
+    def __init__(self):
+        self.refresh_tokens = FakeCollection()
+        self.revoked_tokens = FakeCollection()
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(server, "db", fake)
+    monkeypatch.setattr(server, "revocation_list", RevocationList())
+    return fake
+
+def access_token(admin_type="lab", expires_delta=None):
+    return create_access_token({"sub": ADMIN["id"], "type": admin_type, "email": ADMIN["email"], "name": ADMIN["name"]}, expires_delta)
+
+def bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+def test_refresh_rotates_and_is_single_use(db):
+    issued = asyncio.run(server.issue_tokens(ADMIN, "lab"))
+    rotated = asyncio.run(rotate_refresh_token(issued["refresh_token"], "lab"))
+
+    assert rotated["refresh_token"] != issued["refresh_token"]
+    assert [d["token_hash"] for d in db.refresh_tokens.docs] == [hash_token(rotated["refresh_token"])]
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(rotate_refresh_token(issued["refresh_token"], "lab"))
+    assert exc.value.status_code == 401
+
+def test_refresh_rejects_other_admin_type_and_expired_tokens(db):
+    issued = asyncio.run(server.issue_tokens(ADMIN, "lab"))
+    with pytest.raises(HTTPException):
+        asyncio.run(rotate_refresh_token(issued["refresh_token"], "icc"))
+
+    db.refresh_tokens.docs[0]["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    with pytest.raises(HTTPException):
+        asyncio.run(rotate_refresh_token(issued["refresh_token"], "lab"))
+
+def test_logout_revokes_access_token_and_deletes_refresh_token(db):
+    issued = asyncio.run(server.issue_tokens(ADMIN, "lab"))
+    asyncio.run(logout_admin(bearer(issued["token"]), LogoutRequest(refresh_token=issued["refresh_token"]), "lab"))
+
+    assert db.refresh_tokens.docs == []
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.get_current_admin(bearer(issued["token"]), "lab"))
+    assert exc.value.status_code == 401
+
+def test_logout_with_expired_access_token_still_deletes_refresh_token(db):
+    issued = asyncio.run(server.issue_tokens(ADMIN, "lab"))
+    expired = access_token(expires_delta=timedelta(minutes=-1))
+
+    asyncio.run(logout_admin(bearer(expired), LogoutRequest(refresh_token=issued["refresh_token"]), "lab"))
+
+    assert db.refresh_tokens.docs == []
+    assert db.revoked_tokens.docs == []
+
+def test_logout_with_only_a_refresh_token(db):
+    issued = asyncio.run(server.issue_tokens(ADMIN, "lab"))
+    asyncio.run(logout_admin(None, LogoutRequest(refresh_token=issued["refresh_token"]), "lab"))
+    assert db.refresh_tokens.docs == []
+
+def test_logout_without_valid_credentials_is_401(db):
+    for credentials in (None, bearer("not-a-jwt"), bearer(access_token("icc"))):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(logout_admin(credentials, None, "lab"))
+        assert exc.value.status_code == 401
+
+def test_reload_keeps_local_revocations_and_drops_expired_ones():
+    now = datetime.now(timezone.utc)
+    collection = FakeCollection([
+        {"jti": "other-worker", "expires_at": now + timedelta(minutes=5)},
+        {"jti": "expired", "expires_at": now - timedelta(minutes=5)},
+    ])
+    revocations = RevocationList()
+    revocations._local = {"local-live": now + timedelta(minutes=5), "local-expired": now - timedelta(minutes=5)}
+
+    asyncio.run(revocations.reload(collection))
+
+    assert revocations.is_revoked("other-worker")
+    assert revocations.is_revoked("local-live")
+    assert not revocations.is_revoked("expired")
+    assert not revocations.is_revoked("local-expired")
@@ -0,0 +1,138 @@
+import asyncio
+import io
+
+import pytest
+
+from pymongo.errors import DuplicateKeyError
+
+from bulk_import import build_import_doc, file_import_id, insert_ordered, iter_records, run_import, validate_chunk
+
+LAB_ROW = {
+    "name": "Asha",
+    "roll_number": "21CS001",
+    "stream": "CS",
+    "phone": "9999999999",
+    "email": "asha@example.com",
+    "lab_number": "Lab 3",
+    "complaint": "Projector not working",
+    "photo_base64": "",
+}
+
+def test_empty_csv_cells_are_not_provided():
+    doc = build_import_doc("lab", "imp", 1, {**LAB_ROW, "status": "", "created_at": ""})
+    assert doc["photo_base64"] is None
+    assert doc["status"] == "pending"
+    assert doc["version"] == 0
+    assert doc["import_id"] == "imp"
+
+def test_ids_are_deterministic_per_import_and_row():
+    first = build_import_doc("lab", "imp", 7, LAB_ROW)["id"]
+    assert build_import_doc("lab", "imp", 7, LAB_ROW)["id"] == first
+    assert build_import_doc("lab", "imp", 8, LAB_ROW)["id"] != first
+    assert build_import_doc("lab", "other", 7, LAB_ROW)["id"] != first
+
+@pytest.mark.parametrize("given, stored", [
+    ("2023-05-01T10:00:00", "2023-05-01T10:00:00+00:00"),
+    ("2023-05-01T10:00:00+05:30", "2023-05-01T04:30:00+00:00"),
+])
+def test_created_at_is_stored_as_utc(given, stored):
+    doc = build_import_doc("lab", "imp", 1, {**LAB_ROW, "created_at": given})
+    assert doc["created_at"] == stored
+
+def test_lab_rows_carry_a_minhash_and_icc_rows_do_not():
+    detailed = {**LAB_ROW, "complaint": "Projector shows no signal, screen stays blank"}
+    assert len(build_import_doc("lab", "imp", 1, detailed)["minhash"]) == 64
+    # Too short to compare, so never linked as a duplicate
+    assert "minhash" not in build_import_doc("lab", "imp", 1, LAB_ROW)
+    icc_row = {k: v for k, v in LAB_ROW.items() if k not in ("lab_number", "photo_base64")}
+    assert "minhash" not in build_import_doc("icc", "imp", 1, icc_row)
+
+@pytest.mark.parametrize("record, message", [
+    ({**LAB_ROW, "status": "closed"}, "status: must be one of"),
+    ({**LAB_ROW, "created_at": "yesterday"}, "created_at: must be an ISO 8601 timestamp"),
+    ({"__error__": "Invalid JSON: Expecting value"}, "Invalid JSON"),
+    (["not", "an", "object"], "Row must be an object"),
+])
+def test_invalid_rows_raise(record, message):
+    with pytest.raises(ValueError, match=message):
+        build_import_doc("lab", "imp", 1, record)
+
+def test_validate_chunk_reports_errors_per_row():
+    missing_email = {k: v for k, v in LAB_ROW.items() if k != "email"}
+    docs, errors = validate_chunk("lab", "imp", [
+        (1, LAB_ROW),
+        (2, missing_email),
+        (3, {**LAB_ROW, "status": "closed"}),
+    ])
+    assert [d["complaint"] for d in docs] == ["Projector not working"]
+    assert errors[0] == {"row": 2, "errors": ["email: Field required"]}
+    assert errors[1]["row"] == 3
+
+def test_iter_records_numbers_rows_and_flags_bad_json():
+    stream = io.StringIO('{"name": "a"}\n\nnot json\n')
+    records = list(iter_records(stream, "ndjson"))
+    assert records[0] == (1, {"name": "a"})
+    assert records[1][0] == 3
+    assert records[1][1]["__error__"].startswith("Invalid JSON")
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._iter = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class FakeCollection:
+    def __init__(self, existing_ids):
+        self.ids = set(existing_ids)
+        self.inserts = []
+
+    def find(self, query, projection):
+        return FakeCursor([{"id": i} for i in query["id"]["$in"] if i in self.ids])
+
+    async def insert_many(self, docs, ordered=True):
+        self.inserts.append([d["id"] for d in docs])
+        self.ids.update(d["id"] for d in docs)
+
+def test_insert_ordered_skips_rows_from_an_earlier_run():
+    collection = FakeCollection(existing_ids={"b", "d"})
+    docs = [{"id": i} for i in "abcde"]
+
+    assert asyncio.run(insert_ordered(collection, docs)) == (3, 2)
+    # One insert, in row order
+    assert collection.inserts == [["a", "c", "e"]]
+
+def test_insert_ordered_with_every_row_present_inserts_nothing():
+    collection = FakeCollection(existing_ids={"a", "b"})
+    assert asyncio.run(insert_ordered(collection, [{"id": "a"}, {"id": "b"}])) == (0, 2)
+    assert collection.inserts == []
+
+def test_default_import_id_changes_with_file_contents(tmp_path):
+    path = tmp_path / "complaints.csv"
+    path.write_text("name\nAsha\n")
+    first = file_import_id(str(path))
+    assert first.startswith("complaints.csv-")
+    assert file_import_id(str(path)) == first
+
+    path.write_text("name\nRavi\n")
+    assert file_import_id(str(path)) != first
+
+class CompletedJobs:
+    async def find_one_and_update(self, query, update, **kwargs):
+        assert query["status"] == {"$ne": "completed"}
+        raise DuplicateKeyError("E11000 duplicate key error")
+
+def test_completed_import_is_not_resumed():
+    db = {"lab_complaints": FakeCollection(existing_ids=())}
+
+    class FakeDB(dict):
+        import_jobs = CompletedJobs()
+
+    with pytest.raises(ValueError, match="already completed"):
+        asyncio.run(run_import(FakeDB(db), "lab", iter([]), "imp", executor=None))
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from server import claim_next_complaint
+
+ADMIN = {"id": "admin-1"}
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.sort_args = None
+
+    def sort(self, key, direction):
+        self.sort_args = (key, direction)
+        return self
+
+    async def to_list(self, length):
+        return self.docs
+
+class FakeCollection:
+    """Records the query each call makes and returns canned results."""
+
+    def __init__(self, claimable=(), matched_count=1, mine=()):
+        self.claimable = list(claimable)
+        self.matched_count = matched_count
+        self.mine = list(mine)
+        self.calls = []
+
+    async def find_one_and_update(self, query, update, sort=None, projection=None, return_document=None):
+        self.calls.append({"query": query, "update": update, "sort": sort, "projection": projection})
+        return self.claimable.pop(0) if self.claimable else None
+
+    async def update_one(self, query, update):
+        self.calls.append({"query": query, "update": update})
+        return SimpleNamespace(matched_count=self.matched_count)
+
+    def find(self, query, projection):
+        self.calls.append({"query": query, "projection": projection})
+        self.cursor = FakeCursor(self.mine)
+        return self.cursor
+
+@pytest.fixture
+def collection(monkeypatch):
+    """Installs a fresh FakeCollection as db.lab_complaints; call it with the canned results."""
+    changed = []
+
+    async def complaints_changed(complaint_type, tracked_ids=()):
+        changed.append(complaint_type)
+
+    monkeypatch.setattr(server, "complaints_changed", complaints_changed)
+
+    def install(**kwargs):
+        fake = FakeCollection(**kwargs)
+        fake.changed = changed
+        monkeypatch.setattr(server, "db", SimpleNamespace(lab_complaints=fake))
+        return fake
+
+    return install
+
+def complaint(complaint_id):
+    return {
+        "id": complaint_id, "name": "S", "roll_number": "1", "stream": "CS", "phone": "1", "email": "s@example.com",
+        "complaint": "Projector broken", "status": "pending", "created_at": "2024-01-01T00:00:00+00:00"
+    }
+
+def test_claim_queues_open_unclaimed_parents_by_priority_then_age():
+    fake = FakeCollection(claimable=[complaint("a")])
+    before = datetime.now(timezone.utc)
+
+    assert asyncio.run(claim_next_complaint(fake, "admin-1"))["id"] == "a"
+
+    [call] = fake.calls
+    now = call["update"]["$set"]["claimed_at"]
+    assert now >= before
+    assert call["query"] == {
+        "status": {"$in": ["pending", "in_progress"]},
+        "parent_id": None,
+        "$or": [{"claimed_by": None}, {"lease_expires_at": {"$lt": now}}]
+    }
+    assert call["sort"] == [("duplicate_count", -1), ("created_at", 1)]
+    assert call["update"]["$set"]["claimed_by"] == "admin-1"
+    assert call["update"]["$set"]["lease_expires_at"] == now + timedelta(seconds=server.CLAIM_LEASE_SECONDS)
+    assert call["projection"]["_id"] == 0
+
+def test_claim_stops_when_the_queue_is_empty(collection):
+    fake = collection(claimable=[complaint("a"), complaint("b")])
+
+    claimed = asyncio.run(server.claim_lab_complaints(5, ADMIN))
+
+    assert [c["id"] for c in claimed] == ["a", "b"]
+    assert len(fake.calls) == 3
+    assert fake.changed == ["lab"]
+
+def test_claim_with_nothing_to_claim_changes_nothing(collection):
+    fake = collection()
+    assert asyncio.run(server.claim_lab_complaints(3, ADMIN)) == []
+    assert fake.changed == []
+
+def test_mine_lists_live_leases_soonest_expiring_first(collection):
+    fake = collection(mine=[complaint("a")])
+
+    assert [c["id"] for c in asyncio.run(server.get_my_lab_complaints(None, ADMIN))] == ["a"]
+
+    [call] = fake.calls
+    assert call["query"]["claimed_by"] == "admin-1"
+    assert call["query"]["status"] == {"$in": ["pending", "in_progress"]}
+    assert set(call["query"]["lease_expires_at"]) == {"$gt"}
+    assert fake.cursor.sort_args == ("lease_expires_at", 1)
+
+def test_renew_extends_only_a_live_lease_of_the_caller(collection):
+    fake = collection()
+
+    result = asyncio.run(server.renew_lab_complaint_claim("a", ADMIN))
+
+    [call] = fake.calls
+    assert call["query"]["id"] == "a"
+    assert call["query"]["claimed_by"] == "admin-1"
+    assert set(call["query"]["lease_expires_at"]) == {"$gt"}
+    assert call["update"] == {"$set": {"lease_expires_at": result["lease_expires_at"]}}
+    assert fake.changed == ["lab"]
+
+def test_renew_of_expired_or_foreign_claim_is_409(collection):
+    fake = collection(matched_count=0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.renew_lab_complaint_claim("a", ADMIN))
+    assert exc.value.status_code == 409
+    assert fake.changed == []
+
+def test_release_clears_the_claim(collection):
+    fake = collection()
+
+    asyncio.run(server.release_lab_complaint("a", ADMIN))
+
+    [call] = fake.calls
+    assert call["query"] == {"id": "a", "claimed_by": "admin-1"}
+    assert call["update"] == {"$unset": {"claimed_by": "", "claimed_at": "", "lease_expires_at": ""}}
+    assert fake.changed == ["lab"]
+
+def test_release_of_foreign_claim_is_409(collection):
+    fake = collection(matched_count=0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.release_lab_complaint("a", ADMIN))
+    assert exc.value.status_code == 409
+    assert fake.changed == []
@@ -0,0 +1,155 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from complaint_clustering import ComplaintClusterIndex, LSHIndex, MinHasher
+
+PROJECTOR = "The projector in lab 3 is not working, it shows no signal and the screen stays blank"
+PROJECTOR_AGAIN = "Projector in lab 3 not working, it shows no signal and screen stays blank since morning"
+AC_LEAK = "The AC in the lab is leaking water onto the floor near the door"
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction):
+        self._docs = sorted(self._docs, key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        if "updated_at" in query:
+            since = query["updated_at"]["$gte"]
+            return FakeCursor([d for d in self.docs if d.get("updated_at", "") >= since])
+        return FakeCursor([d for d in self.docs if d["status"] != "resolved"])
+
+def test_signature_is_deterministic_across_instances():
+    assert MinHasher().signature(PROJECTOR) == MinHasher().signature(PROJECTOR)
+
+def test_near_duplicate_links_to_parent():
+    index = ComplaintClusterIndex()
+    signature, parent_id = index.find_parent("Lab 3", PROJECTOR)
+    assert parent_id is None
+    index.add("a", "Lab 3", signature)
+
+    # Lab numbers are matched case-insensitively
+    signature, parent_id = index.find_parent("lab 3", PROJECTOR_AGAIN)
+    assert parent_id == "a"
+
+def test_unrelated_complaint_and_other_lab_miss():
+    index = ComplaintClusterIndex()
+    index.add("a", "Lab 3", index.hasher.signature(PROJECTOR))
+
+    assert index.find_parent("Lab 3", AC_LEAK)[1] is None
+    assert index.find_parent("Lab 4", PROJECTOR_AGAIN)[1] is None
+
+@pytest.mark.parametrize("first, second", [
+    ("Internet is not working in the lab", "Projector is not working in the lab"),
+    ("AC not working", "Fan not working"),
+    ("कंप्यूटर काम नहीं कर रहा", "प्रोजेक्टर खराब है"),
+    ("!!!", "???"),
+    ("", ""),
+])
+def test_different_or_contentless_complaints_are_not_linked(first, second):
+    index = ComplaintClusterIndex()
+    signature, _ = index.find_parent("Lab 3", first)
+    index.add("a", "Lab 3", signature)
+
+    assert index.find_parent("Lab 3", second)[1] is None
+    # Not even an identical copy links when the text is too short to compare
+    if signature is None:
+        assert index.find_parent("Lab 3", first)[1] is None
+
+def test_unicode_text_is_compared_by_words():
+    hasher = MinHasher()
+    text = "लैब 3 का प्रोजेक्टर सिग्नल नहीं दिखा रहा स्क्रीन खाली"
+    assert hasher.shingles(text) == {"लैब", "3", "प्रोजेक्टर", "सिग्नल", "दिखा", "स्क्रीन", "खाली"}
+
+    index = ComplaintClusterIndex()
+    index.add("a", "Lab 3", hasher.signature(text))
+    assert index.find_parent("Lab 3", text + " सुबह से")[1] == "a"
+
+def test_removing_parent_makes_members_standalone():
+    hasher = MinHasher()
+    lsh = LSHIndex(bands=16, rows=4)
+    lsh.add("a", hasher.signature(PROJECTOR))
+    lsh.add("b", hasher.signature(PROJECTOR_AGAIN), parent_id="a")
+    assert lsh.parent_of("b") == "a"
+
+    lsh.remove("a")
+
+    assert lsh.parent_of("a") is None
+    assert lsh.parent_of("b") == "b"
+    assert lsh.best_match(hasher.signature(PROJECTOR), 0.5)[0] == "b"
+
+def test_removing_member_keeps_parent():
+    hasher = MinHasher()
+    lsh = LSHIndex(bands=16, rows=4)
+    lsh.add("a", hasher.signature(PROJECTOR))
+    lsh.add("b", hasher.signature(PROJECTOR_AGAIN), parent_id="a")
+
+    lsh.remove("b")
+
+    assert len(lsh) == 1
+    assert lsh.best_match(hasher.signature(PROJECTOR_AGAIN), 0.5)[0] == "a"
+
+def test_rebuild_indexes_parents_before_duplicates():
+    collection = FakeCollection([
+        {"id": "b", "lab_number": "Lab 3", "complaint": PROJECTOR_AGAIN, "parent_id": "a",
+         "status": "pending", "created_at": "2024-01-02T00:00:00"},
+        {"id": "a", "lab_number": "Lab 3", "complaint": PROJECTOR,
+         "status": "pending", "created_at": "2024-01-01T00:00:00"},
+        # Duplicate of a resolved parent: indexed as its own cluster
+        {"id": "d", "lab_number": "Lab 5", "complaint": AC_LEAK, "parent_id": "c",
+         "status": "in_progress", "created_at": "2024-01-04T00:00:00"},
+        {"id": "c", "lab_number": "Lab 5", "complaint": AC_LEAK,
+         "status": "resolved", "created_at": "2024-01-03T00:00:00"},
+    ])
+    index = ComplaintClusterIndex()
+
+    asyncio.run(index.rebuild(collection))
+
+    assert "c" not in index
+    assert index.find_parent("Lab 3", PROJECTOR_AGAIN)[1] == "a"
+    assert index.find_parent("Lab 5", AC_LEAK)[1] == "d"
+
+def test_sync_applies_changes_from_other_workers():
+    hasher = MinHasher()
+    collection = FakeCollection([
+        {"id": "a", "lab_number": "Lab 3", "complaint": PROJECTOR,
+         "status": "pending", "created_at": "2024-01-01T00:00:00"},
+        {"id": "c", "lab_number": "Lab 5", "complaint": AC_LEAK,
+         "status": "pending", "created_at": "2024-01-03T00:00:00"},
+    ])
+    index = ComplaintClusterIndex()
+    asyncio.run(index.rebuild(collection))
+
+    # Another worker resolves c and accepts a new complaint that links to a
+    now = datetime.now(timezone.utc).isoformat()
+    collection.docs[1].update(status="resolved", updated_at=now)
+    collection.docs.append({
+        "id": "b", "lab_number": "Lab 3", "complaint": PROJECTOR_AGAIN, "parent_id": "a",
+        "minhash": list(hasher.signature(PROJECTOR_AGAIN)),
+        "status": "pending", "created_at": now, "updated_at": now
+    })
+
+    asyncio.run(index.sync(collection))
+
+    assert "c" not in index
+    assert "b" in index
+    assert index.find_parent("Lab 5", AC_LEAK)[1] is None
+    assert index.find_parent("Lab 3", PROJECTOR_AGAIN)[1] == "a"
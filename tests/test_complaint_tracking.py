@@ -0,0 +1,154 @@
+import asyncio
+
+from cache_sync import CacheGenerations
+from complaint_tracking import TrackingCache
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._iter = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class FakeGenerations:
+    """The cache_generations collection, already holding the given counter documents."""
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+
+    def find(self, query, projection):
+        return FakeCursor([{"_id": d["_id"], "generation": d["generation"]} for d in self.docs.values()])
+
+    async def find_one(self, query, projection):
+        return self.docs.get(query["_id"])
+
+def make_cache(max_entries=50000):
+    cache = TrackingCache()
+    cache.max_entries = max_entries
+    return cache
+
+def test_concurrent_misses_share_one_load():
+    cache = make_cache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"status": "pending"}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("c1", "h", load) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert results == [{"status": "pending"}] * 5
+
+def test_invalidation_while_loading_is_not_cached():
+    cache = make_cache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"status": "pending"}
+
+    async def run():
+        first = asyncio.ensure_future(cache.get_or_load("c1", "h", load))
+        await asyncio.sleep(0)
+        cache.invalidate("c1")
+        await first
+        # The stale result was dropped, so this lookup goes to the loader again
+        await cache.get_or_load("c1", "h", load)
+
+    asyncio.run(run())
+
+    assert len(calls) == 2
+
+def test_invalidate_only_drops_that_complaint():
+    cache = make_cache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return None
+
+    async def run():
+        for key in [("c1", "a"), ("c1", "b"), ("c2", "a")]:
+            await cache.get_or_load(*key, load)
+        cache.invalidate("c1")
+        for key in [("c1", "a"), ("c1", "b"), ("c2", "a")]:
+            await cache.get_or_load(*key, load)
+
+    asyncio.run(run())
+
+    assert len(calls) == 5
+
+def test_least_recently_stored_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+
+    async def load():
+        return None
+
+    async def run():
+        for complaint_id in ["c1", "c2", "c3"]:
+            await cache.get_or_load(complaint_id, "h", load)
+
+    asyncio.run(run())
+
+    assert list(cache._entries) == [("c2", "h"), ("c3", "h")]
+    assert "c1" not in cache._by_complaint
+
+def test_poll_reports_changed_ids_since_last_seen_generation():
+    generations = CacheGenerations()
+    generations._collection = FakeGenerations([
+        {"_id": "lab", "generation": 3, "changes": [{"generation": 2, "ids": ["a"]}, {"generation": 3, "ids": ["b"]}]},
+    ])
+    seen = []
+
+    async def on_change(scope, complaint_ids):
+        seen.append((scope, complaint_ids))
+
+    async def run():
+        # First sight: nothing is known about earlier writes
+        await generations.poll(on_change)
+        generations._collection.docs["lab"] = {
+            "_id": "lab", "generation": 5,
+            "changes": [{"generation": 2, "ids": ["a"]}, {"generation": 3, "ids": ["b"]},
+                        {"generation": 5, "ids": ["c", "d"]}]
+        }
+        await generations.poll(on_change)
+        # No new generation, no callback
+        await generations.poll(on_change)
+
+    asyncio.run(run())
+
+    assert seen == [("lab", None), ("lab", {"c", "d"})]
+
+def test_poll_falls_back_to_unknown_when_changes_were_dropped():
+    generations = CacheGenerations()
+    generations.max_changes = 2
+    generations._collection = FakeGenerations([{"_id": "icc", "generation": 1}])
+    seen = []
+
+    async def on_change(scope, complaint_ids):
+        seen.append(complaint_ids)
+
+    async def run():
+        await generations.poll(on_change)
+        # Generations 2 and 3 were pushed out of the capped list
+        generations._collection.docs["icc"] = {
+            "_id": "icc", "generation": 5,
+            "changes": [{"generation": 4, "ids": ["x"]}, {"generation": 5, "ids": ["y"]}]
+        }
+        await generations.poll(on_change)
+
+    asyncio.run(run())
+
+    assert seen == [None, None]
@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+
+from mongo_monitoring import SlowQueryRecorder, _command_shape, _explainable, _summarize_explain
+
+def make_recorder(threshold_ms=100, max_shapes=200):
+    recorder = SlowQueryRecorder()
+    recorder.threshold_ms = threshold_ms
+    recorder.max_shapes = max_shapes
+    return recorder
+
+def run_command(recorder, command_name, command, duration_ms, request_id=1, failed=False):
+    """Feed the recorder the started/finished event pair pymongo would send."""
+    recorder.started(SimpleNamespace(
+        command_name=command_name, command=command, connection_id=("localhost", 27017), request_id=request_id
+    ))
+    finished = SimpleNamespace(
+        command_name=command_name, database_name="test_database", connection_id=("localhost", 27017),
+        request_id=request_id, duration_micros=int(duration_ms * 1000)
+    )
+    if failed:
+        recorder.failed(finished)
+    else:
+        recorder.succeeded(finished)
+
+def test_only_operations_at_or_over_the_threshold_are_recorded():
+    recorder = make_recorder(threshold_ms=100)
+
+    run_command(recorder, "find", {"find": "lab_complaints", "filter": {"id": "a"}}, 99.9, request_id=1)
+    assert recorder.report() == []
+
+    run_command(recorder, "find", {"find": "lab_complaints", "filter": {"id": "a"}}, 100, request_id=2)
+    run_command(recorder, "find", {"find": "lab_complaints", "filter": {"id": "b"}}, 300, request_id=3, failed=True)
+
+    [entry] = recorder.report()
+    assert entry["count"] == 2
+    assert entry["max_ms"] == 300
+    assert entry["avg_ms"] == 200
+    assert entry["explain"] is None
+
+def test_untracked_commands_are_ignored():
+    recorder = make_recorder(threshold_ms=0)
+    run_command(recorder, "insert", {"insert": "lab_complaints", "documents": [{"id": "a"}]}, 500)
+    assert recorder.report() == []
+
+def test_queries_differing_only_in_values_share_a_shape():
+    recorder = make_recorder(threshold_ms=0)
+    run_command(recorder, "find", {
+        "find": "lab_complaints", "filter": {"status": {"$in": ["pending", "in_progress"]}, "parent_id": None},
+        "sort": {"created_at": -1}
+    }, 150, request_id=1)
+    run_command(recorder, "find", {
+        "find": "lab_complaints", "filter": {"status": {"$in": ["resolved"]}, "parent_id": None},
+        "sort": {"created_at": -1}
+    }, 150, request_id=2)
+
+    [entry] = recorder.report()
+    assert entry["count"] == 2
+    assert entry["shape"] == {"filter": {"status": {"$in": ["str"]}, "parent_id": "NoneType"}, "sort": {"created_at": -1}}
+
+def test_sort_is_part_of_the_shape():
+    shape = _command_shape("find", {"find": "c", "filter": {"status": "pending"}, "sort": {"created_at": 1}})
+    other = _command_shape("find", {"find": "c", "filter": {"status": "pending"}, "sort": {"created_at": -1}})
+    assert shape != other
+    assert _command_shape("find", {"find": "c", "filter": {"status": {"$in": []}}}) == {"filter": {"status": {"$in": []}}}
+
+def test_write_shapes_use_the_statement_filter():
+    update = {"update": "lab_complaints", "updates": [{"q": {"id": "a", "version": 3}, "u": {"$set": {"status": "resolved"}}}]}
+    delete = {"delete": "lab_complaints", "deletes": [{"q": {"id": "a"}, "limit": 1}]}
+    assert _command_shape("update", update) == {"filter": {"id": "str", "version": "int"}}
+    assert _command_shape("delete", delete) == {"filter": {"id": "str"}}
+    assert _command_shape("aggregate", {"aggregate": "c", "pipeline": [{"$match": {"status": "pending"}}]}) == {
+        "pipeline": [{"$match": {"status": "str"}}]
+    }
+
+def test_writes_are_explained_as_finds():
+    find_and_modify = {
+        "findAndModify": "lab_complaints", "query": {"parent_id": None}, "sort": {"duplicate_count": -1},
+        "update": {"$set": {"claimed_by": "admin"}}
+    }
+    assert _explainable("findAndModify", find_and_modify) == {
+        "find": "lab_complaints", "filter": {"parent_id": None}, "sort": {"duplicate_count": -1}
+    }
+    assert _explainable("update", {"update": "c", "updates": [{"q": {"id": "a"}, "u": {}}]}) == {"find": "c", "filter": {"id": "a"}}
+    assert _explainable("delete", {"delete": "c", "deletes": [{"q": {"id": "a"}, "limit": 1}]}) == {"find": "c", "filter": {"id": "a"}}
+    assert _explainable("find", {"find": "c", "filter": {}, "limit": 5, "lsid": {}}) == {"find": "c", "filter": {}, "limit": 5}
+    assert _explainable("getMore", {"getMore": 1}) is None
+
+def test_least_recently_seen_shapes_are_evicted():
+    recorder = make_recorder(threshold_ms=0, max_shapes=2)
+    for request_id, field in enumerate(["a", "b", "a", "c"]):
+        run_command(recorder, "find", {"find": "lab_complaints", "filter": {field: 1}}, 10, request_id=request_id)
+
+    shapes = {tuple(e["shape"]["filter"]) for e in recorder.report()}
+    assert shapes == {("a",), ("c",)}
+
+def test_collection_scan_is_flagged_in_the_explain_summary():
+    summary = _summarize_explain({
+        "queryPlanner": {"winningPlan": {
+            "stage": "SORT", "inputStage": {"stage": "FETCH", "inputStages": [{"stage": "COLLSCAN"}]}
+        }},
+        "executionStats": {"totalDocsExamined": 5000, "totalKeysExamined": 0, "nReturned": 20},
+    })
+    assert summary["stages"] == ["SORT", "FETCH", "COLLSCAN"]
+    assert summary["collection_scan"] is True
+    assert summary["indexes"] == []
+    assert (summary["docs_examined"], summary["keys_examined"], summary["returned"]) == (5000, 0, 20)
+
+    indexed = _summarize_explain({"queryPlanner": {"winningPlan": {
+        "stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status_1_created_at_-1"}
+    }}})
+    assert indexed["collection_scan"] is False
+    assert indexed["indexes"] == ["status_1_created_at_-1"]
+
+def test_explain_runs_on_the_event_loop_and_is_attached():
+    commands = []
+
+    class FakeDB:
+        async def command(self, command):
+            commands.append(command)
+            return {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+    recorder = make_recorder(threshold_ms=0)
+
+    async def run():
+        recorder.start(FakeDB())
+        run_command(recorder, "findAndModify", {"findAndModify": "lab_complaints", "query": {"parent_id": None}}, 120)
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert commands == [{"explain": {"find": "lab_complaints", "filter": {"parent_id": None}, "sort": {}}, "verbosity": "executionStats"}]
+    [entry] = recorder.report()
+    assert entry["explain"]["collection_scan"] is True
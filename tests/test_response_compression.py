@@ -0,0 +1,117 @@
+import asyncio
+import gzip
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import response_compression
+from response_compression import COMPRESSORS, CompressionMiddleware, ResponseCache, negotiate_encoding
+
+BODY = b'{"complaints": [' + b'{"status": "pending"},' * 200 + b'{}]}'
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, zstd, br", "zstd"),
+    ("br;q=0.8, gzip;q=0.9", "gzip"),
+    ("zstd;q=0, gzip", "gzip"),
+    ("*", "zstd"),
+    ("*;q=0.5, br", "br"),
+    ("*, zstd;q=0", "br"),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+])
+def test_negotiate_encoding(monkeypatch, header, expected):
+    # Brotli is optional; negotiate against a fixed set of available encodings
+    monkeypatch.setattr(response_compression, "COMPRESSORS", dict.fromkeys(["zstd", "br", "gzip"], bytes))
+    assert negotiate_encoding(header) == expected
+
+def test_negotiate_encoding_skips_unavailable(monkeypatch):
+    monkeypatch.setattr(response_compression, "COMPRESSORS", {"gzip": COMPRESSORS["gzip"]})
+    assert negotiate_encoding("zstd, br, gzip;q=0.1") == "gzip"
+    assert negotiate_encoding("zstd, br") is None
+
+def test_zstd_compressor_is_safe_across_threads():
+    import zstandard
+    payloads = [BODY + str(i).encode() for i in range(64)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(COMPRESSORS["zstd"], payloads))
+    decompressor = zstandard.ZstdDecompressor()
+    assert [decompressor.decompress(r) for r in results] == payloads
+
+def run_app(messages, accept_encoding="gzip"):
+    async def app(scope, receive, send):
+        for message in messages:
+            await send(message)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app)(scope, None, send))
+    return sent
+
+def start(content_type=b"application/json", extra=()):
+    return {"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type), *extra]}
+
+def test_compresses_large_single_body():
+    sent = run_app([start(), {"type": "http.response.body", "body": BODY}])
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"content-length"] == str(len(sent[1]["body"])).encode()
+    assert gzip.decompress(sent[1]["body"]) == BODY
+
+@pytest.mark.parametrize("messages", [
+    # Below the minimum size
+    [start(), {"type": "http.response.body", "body": b'{"ok": true}'}],
+    # Already encoded, e.g. a precompressed cache entry
+    [start(extra=[(b"content-encoding", b"br")]), {"type": "http.response.body", "body": BODY}],
+    # Not a compressible content type
+    [start(content_type=b"image/png"), {"type": "http.response.body", "body": BODY}],
+    # Streaming body
+    [
+        start(),
+        {"type": "http.response.body", "body": BODY, "more_body": True},
+        {"type": "http.response.body", "body": BODY, "more_body": False},
+    ],
+])
+def test_passthrough(messages):
+    sent = run_app([dict(m) for m in messages])
+    assert sent == messages
+
+def test_identity_when_client_accepts_nothing():
+    messages = [start(), {"type": "http.response.body", "body": BODY}]
+    assert run_app(messages, accept_encoding="identity") == messages
+
+def test_response_cache_evicts_expired_entries(monkeypatch):
+    cache = ResponseCache()
+    cache.set(("lab", None), BODY, generation=1)
+    assert cache.get(("lab", None), 1) is not None
+
+    later = time.monotonic() + cache.ttl_seconds + 1
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert cache.get(("lab", None), 1) is None
+    assert len(cache._entries) == 0
+
+def test_response_cache_misses_on_newer_generation():
+    cache = ResponseCache()
+    cache.set(("lab", None), BODY, generation=1)
+    assert cache.get(("lab", None), 2) is None
+    assert len(cache._entries) == 0
+
+def test_response_cache_is_lru_bounded():
+    cache = ResponseCache()
+    cache.max_entries = 2
+    cache.set(("lab", ("id",)), BODY)
+    cache.set(("lab", ("id", "status")), BODY)
+    cache.get(("lab", ("id",)))
+    cache.set(("lab", ("id", "name")), BODY)
+
+    assert cache.get(("lab", ("id",))) is not None
+    assert cache.get(("lab", ("id", "status"))) is None
+    assert cache.get(("lab", ("id", "name"))) is not None
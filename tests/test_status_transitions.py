@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+import server
+from server import STATUS_TRANSITIONS, StatusUpdate, allowed_previous_statuses, transition_complaint_status
+
+class FakeCollection:
+    """Records the update filter and returns canned results for the two calls the helper makes."""
+
+    def __init__(self, updated=None, current=None):
+        self.updated = updated
+        self.current = current
+        self.query = None
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        self.query = query
+        return self.updated
+
+    async def find_one(self, query, projection=None):
+        return self.current
+
+def transition(collection, status, version=None):
+    return asyncio.run(transition_complaint_status(collection, "c1", StatusUpdate(status=status, version=version)))
+
+def test_resolved_can_only_be_reopened():
+    assert STATUS_TRANSITIONS["resolved"] == {"in_progress"}
+    assert allowed_previous_statuses("pending") == ["in_progress"]
+    assert allowed_previous_statuses("in_progress") == ["pending", "resolved"]
+    assert allowed_previous_statuses("resolved") == ["pending", "in_progress"]
+
+def test_filter_guards_status_and_version():
+    collection = FakeCollection(updated={"id": "c1", "status": "resolved", "version": 4})
+
+    assert transition(collection, "resolved", version=3) == {"id": "c1", "status": "resolved", "version": 4}
+    assert collection.query == {"id": "c1", "status": {"$in": ["pending", "in_progress"]}, "version": 3}
+
+def test_version_zero_matches_documents_without_a_version():
+    collection = FakeCollection(updated={"id": "c1"})
+    transition(collection, "in_progress", version=0)
+    assert collection.query["version"] == {"$in": [0, None]}
+
+def test_omitted_version_skips_the_concurrency_check():
+    collection = FakeCollection(updated={"id": "c1"})
+    transition(collection, "in_progress")
+    assert "version" not in collection.query
+
+def test_missing_complaint_is_404():
+    with pytest.raises(HTTPException) as exc:
+        transition(FakeCollection(), "resolved", version=0)
+    assert exc.value.status_code == 404
+
+def test_forbidden_transition_is_422():
+    with pytest.raises(HTTPException) as exc:
+        transition(FakeCollection(current={"status": "resolved", "version": 2}), "pending", version=2)
+    assert exc.value.status_code == 422
+    assert exc.value.detail["status"] == "resolved"
+
+def test_stale_version_is_409():
+    with pytest.raises(HTTPException) as exc:
+        transition(FakeCollection(current={"status": "in_progress", "version": 3}), "resolved", version=2)
+    assert exc.value.status_code == 409
+    assert exc.value.detail == {"message": "Complaint was modified by another admin", "status": "in_progress", "version": 3}
+
+def test_stale_version_is_409_even_if_transition_is_now_forbidden():
+    # The admin saw a pending complaint; someone else resolved it in the meantime
+    with pytest.raises(HTTPException) as exc:
+        transition(FakeCollection(current={"status": "resolved", "version": 1}), "pending", version=0)
+    assert exc.value.status_code == 409
+
+def test_icc_status_email_is_sent_after_the_response(monkeypatch):
+    collection = FakeCollection(updated={"id": "c1", "email": "s@example.com", "name": "S", "status": "resolved", "version": 1})
+    monkeypatch.setattr(server, "db", type("FakeDB", (), {"icc_complaints": collection})())
+
+    async def changed(complaint_type, tracked_ids=()):
+        pass
+
+    monkeypatch.setattr(server, "complaints_changed", changed)
+    sent = []
+    monkeypatch.setattr(server.email_service, "send_status_update_email", lambda **kwargs: sent.append(kwargs))
+    background_tasks = BackgroundTasks()
+
+    result = asyncio.run(server.update_icc_complaint_status("c1", StatusUpdate(status="resolved"), background_tasks, {}))
+
+    assert result["version"] == 1
+    assert sent == []
+    asyncio.run(background_tasks())
+    assert sent == [{"to_email": "s@example.com", "complaint_type": "ICC", "student_name": "S",
+                     "status": "resolved", "complaint_id": "c1"}]